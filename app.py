@@ -1,12 +1,27 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List, Literal
-import logging, json
-from core.connection_manager import manager, ResponseData
-from llm import NvidiaLLMClient, nvidia_service
+from typing import AsyncIterator, Optional, List, Literal, Union
+import asyncio, logging, json, time
+from core.connection_manager import manager, ResponseData, StateData
+from core.log_pipeline import get_payload_logger
+from core.metrics import REQUEST_LATENCY, REQUESTS, MetricsMiddleware, metrics
+from llm import (
+    NvidiaLLMClient,
+    OverloadedError,
+    TRANSLATION_ERROR,
+    nvidia_service,
+    tenant_key,
+)
+from server import ChatbotServer
+from translation import SentenceSplitter
+from config import settings
 
 logger = logging.getLogger(__name__)
+payload_logger = get_payload_logger(__name__)
+
+socket_server = ChatbotServer(nvidia_service)
 
 app = FastAPI(
     title="Chatbot API", description="A FastAPI-based chatbot service", version="1.0.0"
@@ -20,6 +35,82 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    MetricsMiddleware,
+    routes=["/", "/health", "/chat", "/chat/batch", "/languages", "/metrics", "/ready"],
+)
+
+metrics.gauge(
+    "chatbot_active_connections",
+    "Open client connections per transport",
+    lambda: {("ws",): len(manager.active), ("tcp",): len(socket_server.clients)},
+    ["transport"],
+)
+metrics.gauge(
+    "chatbot_admission_in_flight",
+    "Upstream calls currently admitted",
+    lambda: nvidia_service.admission.in_flight,
+)
+metrics.gauge(
+    "chatbot_admission_queue_depth",
+    "Upstream calls waiting for admission",
+    lambda: nvidia_service.admission.queue_depth,
+)
+metrics.gauge(
+    "chatbot_admission_tenants_waiting",
+    "Tenants with upstream calls waiting for admission",
+    lambda: nvidia_service.admission.stats()["tenants_waiting"],
+)
+metrics.gauge(
+    "chatbot_model_lane_waiting",
+    "Requests waiting for a per-model upstream slot",
+    lambda: {
+        (model,): lane.waiting for model, lane in nvidia_service.router.lanes.items()
+    },
+    ["model"],
+)
+metrics.gauge(
+    "chatbot_model_lane_active",
+    "Upstream calls holding a per-model slot",
+    lambda: {
+        (model,): lane.active for model, lane in nvidia_service.router.lanes.items()
+    },
+    ["model"],
+)
+metrics.gauge(
+    "chatbot_model_lane_concurrency_limit",
+    "Per-model upstream slot limit",
+    lambda: {
+        (model,): lane.max_concurrency
+        for model, lane in nvidia_service.router.lanes.items()
+    },
+    ["model"],
+)
+metrics.gauge(
+    "chatbot_upstream_breaker_state",
+    "Circuit breaker state per model and endpoint (1 for the current state)",
+    lambda: {
+        (model, endpoint, state): float(breaker.state == state)
+        for (model, endpoint), breaker in nvidia_service.resilience.breakers.items()
+        for state in ("closed", "half_open", "open")
+    },
+    ["model", "endpoint", "state"],
+)
+metrics.gauge(
+    "chatbot_cache_hit_ratio",
+    "Hit ratio per response cache",
+    lambda: {
+        ("completion",): nvidia_service.cache.stats()["hit_rate"],
+        ("similarity",): nvidia_service.similarity_cache.stats()["hit_rate"],
+        ("translation",): nvidia_service.translation_cache.stats()["hit_rate"],
+    },
+    ["cache"],
+)
+metrics.gauge(
+    "chatbot_singleflight_in_flight",
+    "Distinct upstream calls in flight through request coalescing, shared or not",
+    lambda: nvidia_service.inflight.in_flight,
+)
 
 
 class ChatMessage(BaseModel):
@@ -32,6 +123,12 @@ class ChatResponse(BaseModel):
     user_id: Optional[str] = None
 
 
+class ChatBatchRequest(BaseModel):
+    messages: List[ChatMessage]
+    # Concurrent upstream calls for this batch, capped by BATCH_MAX_PARALLELISM
+    parallelism: Optional[int] = None
+
+
 @app.get("/")
 async def root():
     return {"message": "Chatbot API is running"}
@@ -42,29 +139,226 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness for load balancers: 503 until warm-up is done or while the upstream is tripped"""
+    ready, report = nvidia_service.readiness()
+    return JSONResponse(report, status_code=200 if ready else 503)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition of request, upstream and cache metrics"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+def client_address(conn: Union[Request, WebSocket]) -> Optional[str]:
+    return conn.client.host if conn.client else None
+
+
 @app.post("/chat", response_model=ChatResponse)
-async def chat(chat_message: ChatMessage):
+async def chat(chat_message: ChatMessage, request: Request):
     try:
-        # Use LLM client directly for API calls
-        response = nvidia_service.generate_response(chat_message.message)
+        # Use the pooled async client so a slow upstream never blocks the event loop
+        response = await nvidia_service.async_generate_response(
+            chat_message.message,
+            tenant=tenant_key(chat_message.user_id, client_address(request)),
+        )
         if response is None:
             response = "I'm sorry, I couldn't generate a response at this time."
         return ChatResponse(response=response, user_id=chat_message.user_id)
+    except OverloadedError as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Server is busy, please retry later",
+            headers={"Retry-After": e.retry_after_header},
+        )
     except Exception as e:
         logger.error(f"Error processing message: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+async def run_batch(
+    messages: List[ChatMessage], parallelism: int, address: Optional[str] = None
+) -> AsyncIterator[str]:
+    """Answer messages with bounded parallelism, yielding NDJSON lines as each completes"""
+    results: asyncio.Queue = asyncio.Queue()
+    pending = iter(enumerate(messages))
+
+    async def worker():
+        # Workers pull the next index when free, so at most `parallelism`
+        # calls are in flight; admission control still applies to each
+        for index, chat_message in pending:
+            line = {"index": index, "user_id": chat_message.user_id}
+            try:
+                line["response"] = await nvidia_service.async_generate_response(
+                    chat_message.message,
+                    tenant=tenant_key(chat_message.user_id, address),
+                )
+            except OverloadedError as e:
+                line["error"] = "busy"
+                line["retry_after"] = e.retry_after
+            except Exception as e:
+                logger.error(f"Error processing batch item {index}: {e}")
+                line["error"] = "internal"
+            await results.put(json.dumps(line) + "\n")
+
+    workers = [asyncio.create_task(worker()) for _ in range(parallelism)]
+    try:
+        for _ in range(len(messages)):
+            yield await results.get()
+    finally:
+        # Stop outstanding calls if the client goes away
+        for task in workers:
+            task.cancel()
+
+
+@app.post("/chat/batch")
+async def chat_batch(batch: ChatBatchRequest, request: Request):
+    """Answer many messages at once; results stream back as NDJSON in completion order"""
+    if len(batch.messages) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {settings.BATCH_MAX_ITEMS} messages",
+        )
+    parallelism = min(
+        batch.parallelism or settings.BATCH_MAX_PARALLELISM,
+        settings.BATCH_MAX_PARALLELISM,
+        max(1, len(batch.messages)),
+    )
+    return StreamingResponse(
+        run_batch(batch.messages, max(1, parallelism), client_address(request)),
+        media_type="application/x-ndjson",
+    )
+
+
 class WSMessageReceive(BaseModel):
-    type: Literal["model", "message", "translate", "languages"]
+    type: Literal["model", "message", "translate", "languages", "pipeline"]
     text: str
     text_from: Optional[str] = None
     text_to: Optional[str] = None
+    stream: bool = False
+    # Identifies the user for fair scheduling; anonymous sessions use the client IP
+    user_id: Optional[str] = None
+
+
+async def answer_message(
+    ws: WebSocket, session_id: str, state: StateData, wb_message: WSMessageReceive
+):
+    """Generate a reply with the session's model and history and send it"""
+    history = manager.memory.history(session_id)
+    if wb_message.stream:
+        chunks = []
+        async for delta in nvidia_service.async_stream_response(
+            wb_message.text,
+            history=history,
+            model=state.model_name,
+            tenant=state.tenant,
+        ):
+            chunks.append(delta)
+            await manager.send_personal(
+                ws, ResponseData(type="delta", message=delta).model_dump_json()
+            )
+        response = "".join(chunks)
+        payload_logger.info("Bot response: %s", response)
+        manager.memory.record_exchange(session_id, wb_message.text, response)
+        await manager.send_personal(
+            ws, ResponseData(type="done", message=response).model_dump_json()
+        )
+        return
+
+    response = await nvidia_service.async_generate_response(
+        wb_message.text, history=history, model=state.model_name, tenant=state.tenant
+    )
+    if response is None:
+        response = "I'm sorry, I couldn't generate a response at this time."
+    payload_logger.info("Bot response: %s", response)
+    manager.memory.record_exchange(session_id, wb_message.text, response)
+    await manager.send_personal(
+        ws, ResponseData(type="response", message=response).model_dump_json()
+    )
+
+
+async def translate_or_original(text: str, text_from: str, text_to: str) -> str:
+    if text_from == text_to:
+        return text
+    translated = await nvidia_service.translate_text(text, text_from, text_to)
+    return text if translated == TRANSLATION_ERROR else translated
+
+
+async def answer_pipeline(
+    ws: WebSocket, session_id: str, state: StateData, wb_message: WSMessageReceive
+):
+    """Translate the input, stream a reply and translate it back sentence by
+    sentence while the model is still generating."""
+    prompt = await translate_or_original(
+        wb_message.text, state.text_from, state.text_to
+    )
+    history = manager.memory.history(session_id)
+    splitter = SentenceSplitter()
+    chunks: List[str] = []
+    # (translation task, separator) in reply order; None marks the end
+    translations: asyncio.Queue = asyncio.Queue()
+
+    def translate_back(sentence: str, separator: str = ""):
+        task = asyncio.create_task(
+            translate_or_original(sentence, state.text_to, state.text_from)
+        )
+        translations.put_nowait((task, separator))
+
+    async def generate():
+        try:
+            async for delta in nvidia_service.async_stream_response(
+                prompt, history=history, model=state.model_name, tenant=state.tenant
+            ):
+                chunks.append(delta)
+                for sentence, separator in splitter.feed(delta):
+                    translate_back(sentence, separator)
+            rest = splitter.flush()
+            if rest:
+                translate_back(rest)
+        finally:
+            translations.put_nowait(None)
+
+    generator = asyncio.create_task(generate())
+    translated: List[str] = []
+    # The separator after a sentence is sent with the next one, so the reply
+    # keeps its line breaks without trailing whitespace
+    pending_separator = ""
+    try:
+        while (item := await translations.get()) is not None:
+            task, separator = item
+            delta = pending_separator + await task
+            pending_separator = separator
+            if wb_message.stream:
+                await manager.send_personal(
+                    ws, ResponseData(type="delta", message=delta).model_dump_json()
+                )
+            translated.append(delta)
+        await generator
+    finally:
+        generator.cancel()
+        while not translations.empty():
+            item = translations.get_nowait()
+            if item is not None:
+                item[0].cancel()
+
+    response = "".join(translated)
+    payload_logger.info("Bot response: %s", response)
+    # Memory keeps the conversation in the model's language
+    manager.memory.record_exchange(session_id, prompt, "".join(chunks))
+    await manager.send_personal(
+        ws,
+        ResponseData(
+            type="done" if wb_message.stream else "response", message=response
+        ).model_dump_json(),
+    )
 
 
 @app.websocket("/ws/chat")
 async def chat_ws(ws: WebSocket):
-    await manager.connect(ws)
+    session_id = await manager.connect(ws)
+    manager.states[session_id].tenant = tenant_key(address=client_address(ws))
 
     await manager.send_message(
         ws,
@@ -77,50 +371,71 @@ async def chat_ws(ws: WebSocket):
     try:
         while True:
             text = await ws.receive_text()
-            logger.info(f"Received WS: {text}")
+            payload_logger.info("Received WS: %s", text)
             wb_message = WSMessageReceive(**json.loads(text))
-
-            if wb_message.type == "model":
-                manager.state.model_name = wb_message.text
-                nvidia_service.model_name = wb_message.text
-            elif wb_message.type == "message":
-                if wb_message.text.lower() in ["quit", "bye"]:
-                    await manager.send_message(
+            state = manager.states[session_id]
+            if wb_message.user_id:
+                state.tenant = tenant_key(wb_message.user_id, client_address(ws))
+            started = time.perf_counter()
+            status = "ok"
+
+            try:
+                if wb_message.type == "model":
+                    if nvidia_service.router.is_allowed(wb_message.text):
+                        state.model_name = wb_message.text
+                    else:
+                        await manager.send_message(
+                            ws,
+                            ResponseData(
+                                type="error",
+                                message=f"Unknown model: {wb_message.text}",
+                            ),
+                        )
+                elif wb_message.type == "message":
+                    if wb_message.text.lower() in ["quit", "bye"]:
+                        await manager.send_message(
+                            ws,
+                            ResponseData(
+                                type="response", message="Goodbye! Thanks for chatting."
+                            ),
+                        )
+                        break
+                    payload_logger.info("Received message: %s", wb_message.text)
+                    await answer_message(ws, session_id, state, wb_message)
+                elif wb_message.type == "languages":
+                    if wb_message.text_from:
+                        state.text_from = wb_message.text_from
+
+                    if wb_message.text_to:
+                        state.text_to = wb_message.text_to
+
+                elif wb_message.type == "pipeline":
+                    await answer_pipeline(ws, session_id, state, wb_message)
+                elif wb_message.type == "translate":
+                    translated_text = await nvidia_service.translate_text(
+                        wb_message.text, state.text_from, state.text_to
+                    )
+                    await manager.send_personal(
                         ws,
                         ResponseData(
-                            type="response", message="Goodbye! Thanks for chatting."
-                        ),
+                            type="response", message=translated_text
+                        ).model_dump_json(),
                     )
-                    break
-                logger.info(f"Received message: {wb_message.text}")
-                response = await nvidia_service.async_generate_response(wb_message.text)
-                if response is None:
-                    response = "I'm sorry, I couldn't generate a response at this time."
-                logger.info(f"Bot response: {response}")
-                await manager.send_personal(
-                    ws,
-                    ResponseData(type="response", message=response).model_dump_json(),
-                )
-            elif wb_message.type == "languages":
-
-                print("Languages response: ", wb_message.model_dump_json())
-
-                if wb_message.text_from:
-                    nvidia_service.text_from = wb_message.text_from
-
-                if wb_message.text_to:
-                    nvidia_service.text_to = wb_message.text_to
-
-            elif wb_message.type == "translate":
-                translated_text = await nvidia_service.translate_text(
-                    wb_message.text, nvidia_service.text_from, nvidia_service.text_to
-                )
-                await manager.send_personal(
+            except OverloadedError as e:
+                status = "busy"
+                await manager.send_message(
                     ws,
                     ResponseData(
-                        type="response", message=translated_text
-                    ).model_dump_json(),
+                        type="busy",
+                        message=f"Server is busy. Please retry in {e.retry_after_header} seconds.",
+                    ),
                 )
+            except Exception:
+                status = "error"
+                raise
+            finally:
+                REQUESTS.inc("/ws/chat", status)
+                REQUEST_LATENCY.observe(time.perf_counter() - started, "/ws/chat")
     except WebSocketDisconnect:
         logger.info("Client disconnected")
     except Exception as e:
@@ -133,24 +448,36 @@ async def chat_ws(ws: WebSocket):
 
 
 @app.get("/languages")
-async def get_languages():
-    """Get supported languages for translation"""
-    languages = await nvidia_service.get_languages()
+async def get_languages(refresh: bool = False):
+    """Get supported languages for translation; pass refresh=true to bypass the cache"""
+    languages = await nvidia_service.get_languages(force_refresh=refresh)
 
     if languages == {}:
         raise HTTPException(status_code=400, detail="Failed to retrieve languages")
 
-    logger.info(f"Supported languages: {languages}")
+    payload_logger.info("Supported languages: %s", languages)
 
     return languages
 
 
 @app.on_event("startup")
 async def startup_event():
+    await nvidia_service.start()
+    # Warm up in the background so /health answers while /ready reports progress
+    app.state.warmup_task = asyncio.create_task(nvidia_service.warm_up())
+    if settings.WORKERS > 1:
+        await manager.attach_bus(settings.BROKER_SOCKET)
+    if settings.SOCKET_SERVER_ENABLED:
+        await socket_server.start_server()
     logger.info("FastAPI application startup complete")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    app.state.warmup_task.cancel()
     # Shutdown socket server when FastAPI shuts down
+    if socket_server.running:
+        await socket_server.shutdown_server()
+    await manager.detach_bus()
+    await nvidia_service.aclose()
     logger.info("FastAPI application shutdown")
@@ -1,14 +1,23 @@
 import socket
 import json
+import struct
 import threading
 import sys
+import msgpack
+
+LENGTH_PREFIX = struct.Struct(">I")
 
 
 class ChatbotClient:
-    def __init__(self, host="localhost", port=8888):
+    def __init__(self, host="localhost", port=8888, stream=False, protocol="json"):
         self.host = host
         self.port = port
+        self.stream = stream
+        # Connections start in JSON and switch after the handshake
+        self.requested_protocol = protocol
+        self.protocol = "json"
         self.socket = None
+        self.reader = None
         self.running = False
 
     def connect(self):
@@ -16,7 +25,11 @@ class ChatbotClient:
         try:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.socket.connect((self.host, self.port))
+            self.reader = self.socket.makefile("rb")
             self.running = True
+            self.handle_message(self.read_message())
+            if self.requested_protocol != "json":
+                self.negotiate()
 
             # Start listening for messages
             listen_thread = threading.Thread(target=self.listen_for_messages)
@@ -43,50 +56,82 @@ class ChatbotClient:
         finally:
             self.disconnect()
 
+    def negotiate(self):
+        """Ask the server to switch protocols before the listener starts"""
+        self.write_frame({"type": "hello", "protocol": self.requested_protocol})
+        reply = self.read_message()
+        if reply.get("type") != "hello":
+            self.handle_message(reply)
+            return
+        self.protocol = self.requested_protocol
+        print(f"[SYSTEM] Using {self.protocol} framing")
+
+    def write_frame(self, msg):
+        if self.protocol == "msgpack":
+            payload = msgpack.packb(msg, use_bin_type=True)
+            self.socket.sendall(LENGTH_PREFIX.pack(len(payload)) + payload)
+        else:
+            self.socket.sendall((json.dumps(msg) + "\n").encode("utf-8"))
+
+    def read_message(self):
+        """Read one message, or None when the server closed the connection"""
+        if self.protocol == "msgpack":
+            header = self.reader.read(LENGTH_PREFIX.size)
+            if len(header) < LENGTH_PREFIX.size:
+                return None
+            (length,) = LENGTH_PREFIX.unpack(header)
+            message = msgpack.unpackb(self.reader.read(length), raw=False)
+            # Streaming deltas arrive as bare strings
+            if isinstance(message, str):
+                return {"type": "delta", "message": message}
+            return message
+        while True:
+            line = self.reader.readline()
+            if not line:
+                return None
+            if line.strip():
+                return json.loads(line)
+
     def send_message(self, message):
         """Send message to server"""
         try:
             if self.socket is None:
                 print("Not connected to server")
                 return
-            msg = {"message": message}
-            json_msg = json.dumps(msg)
-            self.socket.send(json_msg.encode("utf-8"))
+            self.write_frame({"message": message, "stream": self.stream})
         except Exception as e:
             print(f"Error sending message: {e}")
 
+    def handle_message(self, message):
+        msg_type = message.get("type", "unknown")
+        content = message.get("message", "")
+
+        if msg_type == "system":
+            print(f"[SYSTEM] {content}")
+        elif msg_type == "bot":
+            print(f"[BOT] {content}")
+        elif msg_type == "delta":
+            print(content, end="", flush=True)
+        elif msg_type == "done":
+            print()
+        elif msg_type == "error":
+            print(f"[ERROR] {content}")
+        else:
+            print(f"[{msg_type.upper()}] {content}")
+
     def listen_for_messages(self):
         """Listen for messages from server"""
-        buffer = ""
         while self.running:
             try:
-                if self.socket is None:
+                if self.reader is None:
                     break
-                data = self.socket.recv(1024).decode("utf-8")
-                if not data:
+                message = self.read_message()
+                if message is None:
                     break
+                self.handle_message(message)
 
-                buffer += data
-                while "\n" in buffer:
-                    line, buffer = buffer.split("\n", 1)
-                    if line.strip():
-                        try:
-                            message = json.loads(line.strip())
-                            msg_type = message.get("type", "unknown")
-                            content = message.get("message", "")
-
-                            if msg_type == "system":
-                                print(f"[SYSTEM] {content}")
-                            elif msg_type == "bot":
-                                print(f"[BOT] {content}")
-                            elif msg_type == "error":
-                                print(f"[ERROR] {content}")
-                            else:
-                                print(f"[{msg_type.upper()}] {content}")
-
-                        except json.JSONDecodeError:
-                            print(f"Received invalid JSON: {line}")
-
+            except (json.JSONDecodeError, ValueError) as e:
+                print(f"Received invalid message: {e}")
             except Exception as e:
                 if self.running:
                     print(f"Error receiving message: {e}")
@@ -97,6 +142,7 @@ class ChatbotClient:
         self.running = False
         if self.socket:
             try:
+                self.reader.close()
                 self.socket.close()
             except:
                 pass
@@ -104,7 +150,8 @@ class ChatbotClient:
 
 
 def main():
-    client = ChatbotClient()
+    protocol = "msgpack" if "--msgpack" in sys.argv else "json"
+    client = ChatbotClient(stream="--stream" in sys.argv, protocol=protocol)
     client.connect()
 
 
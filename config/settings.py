@@ -1,17 +1,183 @@
 import os
+from typing import Any, Callable, Dict
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+def _parse_limits(value: str, cast: Callable[[str], Any] = int) -> Dict[str, Any]:
+    """Parse "model-a=4,model-b=16" into {"model-a": 4, "model-b": 16}"""
+    limits = {}
+    for item in value.split(","):
+        if "=" in item:
+            model, limit = item.rsplit("=", 1)
+            limits[model.strip()] = cast(limit)
+    return limits
+
+
 class Settings:
     NVIDIA_API_KEY = os.getenv("NVIDIA_API_KEY")
     NVIDIA_BASE_URL = os.getenv(
         "NVIDIA_BASE_URL", "https://integrate.api.nvidia.com/v1"
     )
     MODEL_NAME = os.getenv("MODEL_NAME", "meta/llama-3.1-8b-instruct")
+    TEMPERATURE = float(os.getenv("TEMPERATURE", 0.7))
     HOST = os.getenv("HOST", "localhost")
     PORT = int(os.getenv("PORT", 8000))
+    # Uvicorn worker processes; more than one links them through the broker
+    WORKERS = int(os.getenv("WORKERS", 1))
+    BROKER_SOCKET = os.getenv("BROKER_SOCKET", "/tmp/chatbot-broker.sock")
+
+    # TCP socket server, run inside the FastAPI event loop when enabled
+    SOCKET_SERVER_ENABLED = (
+        os.getenv("SOCKET_SERVER_ENABLED", "false").lower() == "true"
+    )
+    SOCKET_HOST = os.getenv("SOCKET_HOST", HOST)
+    SOCKET_PORT = int(os.getenv("SOCKET_PORT", 8888))
+    SOCKET_BACKLOG = int(os.getenv("SOCKET_BACKLOG", 4096))
+    SOCKET_MAX_MESSAGE_BYTES = int(os.getenv("SOCKET_MAX_MESSAGE_BYTES", 64 * 1024))
+    SOCKET_WRITE_BUFFER_BYTES = int(os.getenv("SOCKET_WRITE_BUFFER_BYTES", 256 * 1024))
+
+    # Per-WebSocket outbound queue; slow consumers are handled by drop,
+    # coalesce (keep the newest messages) or disconnect when it is full
+    WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", 256))
+    WS_SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", "drop").lower()
+
+    # POST /chat/batch limits
+    BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 1000))
+    BATCH_MAX_PARALLELISM = int(os.getenv("BATCH_MAX_PARALLELISM", 16))
+
+    # Startup warm-up before /ready reports the instance as ready
+    WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    # Also send a one-token completion to warm the upstream model
+    WARMUP_PROBE = os.getenv("WARMUP_PROBE", "false").lower() == "true"
+    WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", 4))
+    WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", 30))
+    # Pause between warm-up rounds while the upstream checks keep failing
+    WARMUP_RETRY_DELAY = float(os.getenv("WARMUP_RETRY_DELAY", 5))
+
+    # Conversation memory
+    MEMORY_MAX_TOKENS_PER_SESSION = int(
+        os.getenv("MEMORY_MAX_TOKENS_PER_SESSION", 2048)
+    )
+    MEMORY_MAX_TOTAL_TOKENS = int(os.getenv("MEMORY_MAX_TOTAL_TOKENS", 2_000_000))
+
+    # Upstream HTTP connection pool
+    UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", 30))
+    UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", 100))
+    UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", 20))
+    UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", 60))
+    UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "true").lower() == "true"
+
+    # Global admission control for upstream calls
+    ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", 64))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 256))
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 5))
+    # Per-tenant fairness. Tenants are "user:<user_id>", or "ip:<address>" for
+    # anonymous clients; queued calls are served by weighted fair queueing.
+    # Weights like "user:nightly-batch=0.2,user:support=4"
+    TENANT_WEIGHTS = _parse_limits(os.getenv("TENANT_WEIGHTS", ""), float)
+    TENANT_DEFAULT_WEIGHT = float(os.getenv("TENANT_DEFAULT_WEIGHT", 1))
+    TENANT_MAX_QUEUE = int(os.getenv("TENANT_MAX_QUEUE", 64))
+    # Token bucket per tenant in requests/second, scaled by weight (0 = off)
+    TENANT_RATE_LIMIT = float(os.getenv("TENANT_RATE_LIMIT", 0))
+    TENANT_BURST = float(os.getenv("TENANT_BURST", 10))
+
+    # Upstream resilience: retries, hedging, circuit breaker and fallback model
+    RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", 3))
+    RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", 0.25))
+    RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", 4))
+    # Send a hedged second request once a call exceeds this latency percentile (0 = off)
+    HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", 0))
+    HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", 20))
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+    BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", 30))
+    FALLBACK_MODEL = os.getenv("FALLBACK_MODEL", "")
+
+    # Per-model upstream lanes: default and per-model concurrency limits
+    MODEL_MAX_CONCURRENCY = int(os.getenv("MODEL_MAX_CONCURRENCY", 16))
+    MODEL_CONCURRENCY_LIMITS = _parse_limits(os.getenv("MODEL_CONCURRENCY_LIMITS", ""))
+    # Models a WS session may switch to, comma-separated; other "model"
+    # messages get an error. The default model, the fallback model and models
+    # with a concurrency limit are always allowed. Set this to every model
+    # your frontend offers
+    ALLOWED_MODELS = (
+        set(
+            os.getenv(
+                "ALLOWED_MODELS",
+                "meta/llama-3.1-8b-instruct,meta/llama-3.3-70b-instruct,"
+                "microsoft/phi-4-mini-instruct",
+            ).split(",")
+        )
+        | {MODEL_NAME, FALLBACK_MODEL}
+        | set(MODEL_CONCURRENCY_LIMITS)
+    ) - {""}
+
+    # Riva NMT translation backend
+    TRANSLATION_SERVER = os.getenv("TRANSLATION_SERVER", "grpc.nvcf.nvidia.com:443")
+    TRANSLATION_USE_SSL = os.getenv("TRANSLATION_USE_SSL", "true").lower() == "true"
+    TRANSLATION_FUNCTION_ID = os.getenv(
+        "TRANSLATION_FUNCTION_ID", "0778f2eb-b64d-45e7-acae-7dd9b9b35b4d"
+    )
+    TRANSLATION_SOURCE_LANGUAGE = os.getenv("TRANSLATION_SOURCE_LANGUAGE", "en")
+    TRANSLATION_TARGET_LANGUAGE = os.getenv("TRANSLATION_TARGET_LANGUAGE", "de")
+    TRANSLATION_MODEL = os.getenv("TRANSLATION_MODEL", "")
+    TRANSLATION_TIMEOUT = float(os.getenv("TRANSLATION_TIMEOUT", 10))
+    TRANSLATION_BATCH_WINDOW_MS = float(os.getenv("TRANSLATION_BATCH_WINDOW_MS", 10))
+    TRANSLATION_MAX_BATCH = int(os.getenv("TRANSLATION_MAX_BATCH", 32))
+    # Persistent translation cache (SQLite, shared by workers) with an
+    # in-process hot tier (opt-in)
+    TRANSLATION_CACHE_ENABLED = (
+        os.getenv("TRANSLATION_CACHE_ENABLED", "false").lower() == "true"
+    )
+    TRANSLATION_CACHE_PATH = os.getenv(
+        "TRANSLATION_CACHE_PATH", "translation_cache.sqlite3"
+    )
+    TRANSLATION_CACHE_MAX_ENTRIES = int(
+        os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", 100_000)
+    )
+    TRANSLATION_CACHE_HOT_ENTRIES = int(
+        os.getenv("TRANSLATION_CACHE_HOT_ENTRIES", 2048)
+    )
+    LANGUAGES_CACHE_TTL = float(os.getenv("LANGUAGES_CACHE_TTL", 3600))
+    LANGUAGES_STALE_TTL = float(os.getenv("LANGUAGES_STALE_TTL", 86400))
+
+    # Exact-match completion cache (opt-in)
+    COMPLETION_CACHE_ENABLED = (
+        os.getenv("COMPLETION_CACHE_ENABLED", "false").lower() == "true"
+    )
+    COMPLETION_CACHE_MAX_BYTES = int(
+        os.getenv("COMPLETION_CACHE_MAX_BYTES", 16 * 1024 * 1024)
+    )
+    COMPLETION_CACHE_TTL = float(os.getenv("COMPLETION_CACHE_TTL", 600))
+    # Only cache temperature == 0 requests when set
+    COMPLETION_CACHE_DETERMINISTIC_ONLY = (
+        os.getenv("COMPLETION_CACHE_DETERMINISTIC_ONLY", "false").lower() == "true"
+    )
+
+    # Share one upstream call between identical concurrent requests
+    COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "true").lower() == "true"
+
+    # Near-duplicate prompt cache (MinHash/LSH, opt-in)
+    SIMILARITY_CACHE_ENABLED = (
+        os.getenv("SIMILARITY_CACHE_ENABLED", "false").lower() == "true"
+    )
+    SIMILARITY_CACHE_THRESHOLD = float(os.getenv("SIMILARITY_CACHE_THRESHOLD", 0.85))
+    SIMILARITY_CACHE_MAX_ENTRIES = int(os.getenv("SIMILARITY_CACHE_MAX_ENTRIES", 10000))
+    SIMILARITY_CACHE_TTL = float(os.getenv("SIMILARITY_CACHE_TTL", 600))
+    SIMILARITY_CACHE_NUM_PERM = int(os.getenv("SIMILARITY_CACHE_NUM_PERM", 64))
+    SIMILARITY_CACHE_BANDS = int(os.getenv("SIMILARITY_CACHE_BANDS", 16))
+
+    # Logging: background file writer with rotation, sampled payload logs
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FILE = os.getenv("LOG_FILE", "chatbot.log")
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 5))
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+    # Workers forward records here so only the supervisor rotates LOG_FILE
+    LOG_SOCKET = os.getenv("LOG_SOCKET", "/tmp/chatbot-log.sock")
+    # Fraction of request/response payload logs to keep (0 = off)
+    LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", 0))
 
     @classmethod
     def validate(cls):
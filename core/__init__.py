@@ -1 +1,11 @@
 from .connection_manager import ConnectionManager, manager, StateData, ResponseData
+from .refreshing_value import RefreshingValue
+from .memory import (
+    ConversationMemory,
+    ScopedMemory,
+    SessionMemoryStore,
+    estimate_tokens,
+    memory_store,
+)
+from .log_pipeline import LazyJson, get_payload_logger, setup_logging, stop_logging
+from .pubsub import Broker, BrokerClient
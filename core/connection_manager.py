@@ -1,50 +1,123 @@
 from fastapi import WebSocket
-from typing import List, Literal
+from typing import Any, Dict, Literal, Optional
 import logging
+import uuid
 from pydantic import BaseModel
+from config import settings
+from .memory import memory_store
+from .outbox import Outbox
+from .pubsub import BrokerClient
 
 logger = logging.getLogger(__name__)
 
 
 class StateData(BaseModel):
-    model_name: str
+    model_name: str = settings.MODEL_NAME
+    text_from: str = settings.TRANSLATION_SOURCE_LANGUAGE
+    text_to: str = settings.TRANSLATION_TARGET_LANGUAGE
+    # Fair-scheduling tenant for upstream calls made on this session's behalf
+    tenant: Optional[str] = None
 
 
 class ResponseData(BaseModel):
-    type: Literal["response", "error"]
+    type: Literal["response", "delta", "done", "busy", "error"]
     message: str
 
 
 class ConnectionManager:
     def __init__(self):
-        self.active: List[WebSocket] = []
-        self.state: StateData = StateData(model_name="microsoft/phi-4-mini-instruct")
+        # Insertion-ordered, so registration and removal are O(1)
+        self.active: Dict[WebSocket, Outbox] = {}
+        self.session_ids: Dict[WebSocket, str] = {}
+        self.sockets: Dict[str, WebSocket] = {}
+        # Per-session model and language choices
+        self.states: Dict[str, StateData] = {}
+        self.memory = memory_store.scope("ws")
+        # Set in multi-worker mode to reach sessions held by other processes
+        self.bus: Optional[BrokerClient] = None
 
-    async def connect(self, ws: WebSocket):
+    async def attach_bus(self, path: str):
+        """Join the cross-process broker for registration and broadcast"""
+        self.bus = BrokerClient(path, self._on_bus_message)
+        await self.bus.start()
+        for session_id in self.sockets:
+            self.bus.register(session_id)
+
+    async def detach_bus(self):
+        if self.bus is not None:
+            await self.bus.aclose()
+            self.bus = None
+
+    async def _on_bus_message(self, frame: Dict[str, Any]):
+        if frame["op"] == "broadcast":
+            await self._broadcast_local(frame["message"])
+        elif frame["op"] == "send":
+            ws = self.sockets.get(frame["session_id"])
+            if ws is not None:
+                self.active[ws].offer(frame["message"])
+
+    async def connect(self, ws: WebSocket) -> str:
         await ws.accept()
-        self.active.append(ws)
+        self.active[ws] = Outbox(
+            ws, settings.WS_SEND_QUEUE_SIZE, settings.WS_SLOW_CONSUMER_POLICY
+        )
+        session_id = uuid.uuid4().hex
+        self.session_ids[ws] = session_id
+        self.sockets[session_id] = ws
+        self.states[session_id] = StateData()
+        if self.bus is not None:
+            self.bus.register(session_id)
+        return session_id
 
     def disconnect(self, ws: WebSocket):
-        self.active.remove(ws)
+        outbox = self.active.pop(ws, None)
+        if outbox is not None:
+            outbox.close()
+        session_id = self.session_ids.pop(ws, None)
+        if session_id is not None:
+            self.sockets.pop(session_id, None)
+            self.memory.drop(session_id)
+            self.states.pop(session_id, None)
+            if self.bus is not None:
+                self.bus.unregister(session_id)
 
     async def send_personal(self, ws: WebSocket, message: str):
-        await ws.send_text(message)
+        """Send to one client through its outbox, waiting until it is written"""
+        outbox = self.active.get(ws)
+        if outbox is None:
+            logger.warning("WebSocket is not connected, dropping message.")
+            return
+        await outbox.send(message)
 
     async def send_message(self, ws: WebSocket, responseData: ResponseData):
-        """Send a message to all connected clients"""
-        if not self.active:
-            logger.warning("No active WebSocket connections to send message.")
-            return
+        """Send a response model (or pre-serialized text) to one client"""
         message = (
             responseData.model_dump_json()
             if isinstance(responseData, BaseModel)
             else responseData
         )
-        await ws.send_text(message)
+        await self.send_personal(ws, message)
+
+    async def send_to_session(self, session_id: str, message: str) -> bool:
+        """Send to a session on this worker, or route it through the broker"""
+        ws = self.sockets.get(session_id)
+        if ws is not None:
+            return self.active[ws].offer(message)
+        if self.bus is not None:
+            return self.bus.send(session_id, message)
+        return False
 
     async def broadcast(self, message: str):
-        for connection in self.active:
-            await connection.send_text(message)
+        """Send to every client, including those connected to other workers"""
+        if self.bus is not None:
+            self.bus.broadcast(message)
+        await self._broadcast_local(message)
+
+    async def _broadcast_local(self, message: str):
+        # Each outbox is drained by its own writer task, so a slow client
+        # only ever delays itself
+        for outbox in list(self.active.values()):
+            outbox.offer(message)
 
 
 manager = ConnectionManager()
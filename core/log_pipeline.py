@@ -0,0 +1,203 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
+import pickle
+import random
+import re
+import socketserver
+import struct
+import sys
+import threading
+from typing import Any, Iterable, Optional
+from config import settings
+
+# Request/response bodies are logged under this logger so they can be
+# sampled and switched off independently of operational logs
+PAYLOAD_LOGGER = "payload"
+
+_SECRET_PATTERNS = [
+    re.compile(r"(Bearer\s+)[A-Za-z0-9._~+/=-]+", re.IGNORECASE),
+    re.compile(r"nvapi-[A-Za-z0-9_-]+"),
+]
+
+_listener: Optional[logging.handlers.QueueListener] = None
+# Set in the supervisor only; worker records are written through it
+_file_handler: Optional[logging.Handler] = None
+
+
+def set_payload_sample_rate(rate: float):
+    """Disabled payload logs are rejected by the level check, before any
+    record is created"""
+    logging.getLogger(PAYLOAD_LOGGER).setLevel(
+        logging.INFO if rate > 0 else logging.WARNING
+    )
+
+
+set_payload_sample_rate(settings.LOG_PAYLOAD_SAMPLE_RATE)
+
+
+def get_payload_logger(name: str) -> logging.Logger:
+    """Logger for payload-level messages from the given module"""
+    return logging.getLogger(f"{PAYLOAD_LOGGER}.{name}")
+
+
+class LazyJson:
+    """Defers json.dumps until a record is actually formatted"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __str__(self) -> str:
+        return json.dumps(self.value, ensure_ascii=False, default=str)
+
+
+def redact(text: str, secrets: Iterable[str] = ()) -> str:
+    """Mask bearer tokens, NVIDIA API keys and any explicitly given secrets"""
+    for secret in secrets:
+        if secret:
+            text = text.replace(secret, "***")
+    for pattern in _SECRET_PATTERNS:
+        text = pattern.sub(lambda m: (m.group(1) if m.groups() else "") + "***", text)
+    return text
+
+
+class RedactingFormatter(logging.Formatter):
+    def __init__(self, fmt: str, secrets: Iterable[str] = ()):
+        super().__init__(fmt)
+        self.secrets = [secret for secret in secrets if secret]
+
+    def format(self, record: logging.LogRecord) -> str:
+        return redact(super().format(record), self.secrets)
+
+
+class PayloadSampler(logging.Filter):
+    """Keep a random fraction of payload records; pass everything else"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.name.split(".", 1)[0] != PAYLOAD_LOGGER:
+            return True
+        return self.rate >= 1 or random.random() < self.rate
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records without formatting them and drop them when the queue is full.
+
+    The stock QueueHandler formats every record on the calling thread; here
+    message merging, JSON dumps and redaction all happen on the listener
+    thread, so the event loop only pays for creating the record.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(
+    level: str = settings.LOG_LEVEL,
+    log_file: Optional[str] = settings.LOG_FILE,
+    payload_sample_rate: float = settings.LOG_PAYLOAD_SAMPLE_RATE,
+) -> logging.handlers.QueueListener:
+    """Route all logging through a queue to a background writer thread"""
+    global _listener, _file_handler
+    if _listener is not None:
+        return _listener
+
+    formatter = RedactingFormatter(
+        "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        secrets=[settings.NVIDIA_API_KEY],
+    )
+    handlers = [logging.StreamHandler(sys.stdout)]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    if log_file and multiprocessing.current_process().name != "MainProcess":
+        # Spawned workers rerun this setup; processes rotating one shared file
+        # would lose lines, so workers ship records to the supervisor's file
+        handlers.append(logging.handlers.SocketHandler(settings.LOG_SOCKET, None))
+    elif log_file:
+        _file_handler = logging.handlers.RotatingFileHandler(
+            log_file,
+            maxBytes=settings.LOG_MAX_BYTES,
+            backupCount=settings.LOG_BACKUP_COUNT,
+            encoding="utf-8",
+        )
+        _file_handler.setFormatter(formatter)
+        handlers.append(_file_handler)
+
+    queue_handler = DroppingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    queue_handler.addFilter(PayloadSampler(payload_sample_rate))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    set_payload_sample_rate(payload_sample_rate)
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, *handlers)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+class _WorkerLogRequest(socketserver.StreamRequestHandler):
+    """Read length-prefixed pickled records sent by a worker's SocketHandler"""
+
+    def handle(self):
+        while True:
+            header = self.rfile.read(4)
+            if len(header) < 4:
+                return
+            (size,) = struct.unpack(">L", header)
+            data = self.rfile.read(size)
+            if len(data) < size:
+                return
+            record = logging.makeLogRecord(pickle.loads(data))
+            self.server.target.handle(record)
+
+
+class _WorkerLogServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def start_log_receiver(path: str = settings.LOG_SOCKET) -> Optional[threading.Thread]:
+    """Write records forwarded by worker processes to this process' log file"""
+    if _file_handler is None:
+        return None
+    if os.path.exists(path):
+        os.unlink(path)
+    server = _WorkerLogServer(path, _WorkerLogRequest)
+    # Records are unpickled, so only this user may connect
+    os.chmod(path, 0o600)
+    server.target = _file_handler
+    thread = threading.Thread(
+        target=server.serve_forever, name="log-receiver", daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,126 @@
+import threading
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Tuple
+from config import settings
+from .metrics import metrics
+
+MEMORY_EVICTIONS = metrics.counter(
+    "chatbot_memory_evictions_total",
+    "Idle sessions dropped from conversation memory to stay under the token cap",
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate (roughly four characters per token)"""
+    return max(1, (len(text) + 3) // 4)
+
+
+class ConversationMemory:
+    """Rolling chat history for one session, trimmed to a token budget"""
+
+    __slots__ = ("turns", "tokens", "max_tokens")
+
+    def __init__(self, max_tokens: int):
+        # (role, content, estimated tokens)
+        self.turns: Deque[Tuple[str, str, int]] = deque()
+        self.tokens = 0
+        self.max_tokens = max_tokens
+
+    def append(self, role: str, content: str) -> int:
+        """Add a turn, drop the oldest turns over budget, and return the token delta.
+
+        History never starts with an assistant turn, since some models require
+        strict user/assistant alternation.
+        """
+        before = self.tokens
+        cost = estimate_tokens(content)
+        self.turns.append((role, content, cost))
+        self.tokens += cost
+        while self.turns and (
+            self.tokens > self.max_tokens or self.turns[0][0] == "assistant"
+        ):
+            self.tokens -= self.turns.popleft()[2]
+        return self.tokens - before
+
+    def messages(self) -> List[Dict[str, str]]:
+        return [{"role": role, "content": content} for role, content, _ in self.turns]
+
+
+class SessionMemoryStore:
+    """Per-session conversation memory with a global token cap.
+
+    Sessions are kept in least-recently-active order; when the total across
+    all sessions exceeds ``max_total_tokens`` the idlest sessions are evicted.
+    """
+
+    def __init__(self, max_tokens_per_session: int, max_total_tokens: int):
+        self.max_tokens_per_session = max_tokens_per_session
+        self.max_total_tokens = max_total_tokens
+        self.total_tokens = 0
+        self._sessions: "OrderedDict[str, ConversationMemory]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def history(self, session_id: str) -> List[Dict[str, str]]:
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            if memory is None:
+                return []
+            self._sessions.move_to_end(session_id)
+            return memory.messages()
+
+    def append(self, session_id: str, role: str, content: str):
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            if memory is None:
+                memory = ConversationMemory(self.max_tokens_per_session)
+                self._sessions[session_id] = memory
+            self._sessions.move_to_end(session_id)
+            self.total_tokens += memory.append(role, content)
+            while self.total_tokens > self.max_total_tokens and len(self._sessions) > 1:
+                idle_id = next(iter(self._sessions))
+                self.total_tokens -= self._sessions.pop(idle_id).tokens
+                MEMORY_EVICTIONS.inc()
+
+    def record_exchange(self, session_id: str, user_message: str, reply: str):
+        self.append(session_id, "user", user_message)
+        self.append(session_id, "assistant", reply)
+
+    def drop(self, session_id: str):
+        with self._lock:
+            memory = self._sessions.pop(session_id, None)
+            if memory is not None:
+                self.total_tokens -= memory.tokens
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def scope(self, prefix: str) -> "ScopedMemory":
+        return ScopedMemory(self, prefix)
+
+
+class ScopedMemory:
+    """One transport's view of a shared store; session ids get a prefix so
+    transports cannot collide while sharing the global token cap"""
+
+    def __init__(self, store: SessionMemoryStore, prefix: str):
+        self.store = store
+        self.prefix = prefix
+
+    def history(self, session_id: str) -> List[Dict[str, str]]:
+        return self.store.history(f"{self.prefix}:{session_id}")
+
+    def append(self, session_id: str, role: str, content: str):
+        self.store.append(f"{self.prefix}:{session_id}", role, content)
+
+    def record_exchange(self, session_id: str, user_message: str, reply: str):
+        self.store.record_exchange(f"{self.prefix}:{session_id}", user_message, reply)
+
+    def drop(self, session_id: str):
+        self.store.drop(f"{self.prefix}:{session_id}")
+
+
+# Shared by every transport so MEMORY_MAX_TOTAL_TOKENS caps them all together
+memory_store = SessionMemoryStore(
+    max_tokens_per_session=settings.MEMORY_MAX_TOKENS_PER_SESSION,
+    max_total_tokens=settings.MEMORY_MAX_TOTAL_TOKENS,
+)
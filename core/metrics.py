@@ -0,0 +1,238 @@
+import bisect
+import math
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple, Union
+
+# Latency buckets in seconds, from cache hits up to slow completions
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+Labels = Tuple[str, ...]
+GaugeValue = Union[float, Dict[Labels, float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in list(self._values.items()):
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            )
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and two additions"""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: non-cumulative bucket counts (last slot is +Inf) and sum
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in list(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), list(counts)):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Gauge read from a callback at scrape time, so the hot path pays nothing"""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        callback: Callable[[], GaugeValue],
+        labelnames: Sequence[str] = (),
+    ):
+        self.name = name
+        self.help = help
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        value = self.callback()
+        samples = value.items() if isinstance(value, dict) else [((), value)]
+        for labels, sample in samples:
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(sample)}"
+            )
+        return lines
+
+
+class MetricsRegistry:
+    """Prometheus text exposition for in-process metrics.
+
+    Metrics are updated from the event loop without locks; a scrape only
+    copies the current values, so concurrent updates from the occasional
+    worker thread can at worst be missed by one scrape.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Union[Counter, Histogram, Gauge]] = {}
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(
+        self,
+        name: str,
+        help: str,
+        callback: Callable[[], GaugeValue],
+        labelnames: Sequence[str] = (),
+    ) -> Gauge:
+        return self._register(Gauge(name, help, callback, labelnames))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+REQUESTS = metrics.counter(
+    "chatbot_requests_total",
+    "Requests handled per route and status",
+    ["route", "status"],
+)
+REQUEST_LATENCY = metrics.histogram(
+    "chatbot_request_duration_seconds", "Request latency per route", ["route"]
+)
+UPSTREAM_RESPONSES = metrics.counter(
+    "chatbot_upstream_responses_total",
+    "Upstream completion responses per model and HTTP status",
+    ["model", "status"],
+)
+UPSTREAM_TTFB = metrics.histogram(
+    "chatbot_upstream_ttfb_seconds",
+    "Time from sending a streaming upstream request to its response headers",
+    ["model"],
+)
+UPSTREAM_TTFT = metrics.histogram(
+    "chatbot_upstream_ttft_seconds",
+    "Time from sending a streaming upstream request to its first token",
+    ["model"],
+)
+UPSTREAM_LATENCY = metrics.histogram(
+    "chatbot_upstream_duration_seconds",
+    "Total upstream completion latency per model",
+    ["model"],
+)
+TRANSLATION_LATENCY = metrics.histogram(
+    "chatbot_translation_duration_seconds",
+    "Translation latency including batching delay",
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting HTTP requests and their latency per route.
+
+    Paths outside ``routes`` are grouped under "other" to bound label
+    cardinality.
+    """
+
+    def __init__(self, app, routes: Iterable[str]):
+        self.app = app
+        self.routes = frozenset(routes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = scope["path"] if scope["path"] in self.routes else "other"
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS.inc(route, str(status))
+            REQUEST_LATENCY.observe(time.perf_counter() - started, route)
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Optional, Tuple
+from fastapi import WebSocket
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SLOW_CONSUMER_POLICIES = ("drop", "coalesce", "disconnect")
+# WebSocket close code 1008 (policy violation) for evicted slow consumers
+SLOW_CONSUMER_CLOSE_CODE = 1008
+# Give up on the close handshake of an evicted consumer after this long
+SLOW_CONSUMER_CLOSE_TIMEOUT = 5.0
+
+DROPPED_MESSAGES = metrics.counter(
+    "chatbot_ws_dropped_messages_total",
+    "Broadcast messages dropped for slow WebSocket consumers",
+    ["policy"],
+)
+
+
+class Outbox:
+    """Bounded outbound queue for one WebSocket, drained by its own writer task.
+
+    ``send`` waits for room and for delivery, so a client's own replies keep
+    their order and backpressure. ``offer`` never waits; when the queue is
+    full the slow-consumer policy applies:
+
+    - drop: discard the new message
+    - coalesce: discard the oldest queued message so the client catches up
+      with the newest ones
+    - disconnect: close the connection
+    """
+
+    def __init__(self, ws: WebSocket, max_size: int, policy: str):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.ws = ws
+        self.max_size = max_size
+        self.policy = policy
+        self.closed = False
+        self._queue: Deque[Tuple[str, Optional[asyncio.Future]]] = deque()
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._evict = False
+        self._closer: Optional[asyncio.Task] = None
+        self._sending: Optional[asyncio.Future] = None
+        self._task = asyncio.create_task(self._drain())
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    async def send(self, message: str):
+        """Queue a message and wait until it has been written"""
+        while len(self._queue) >= self.max_size and not self.closed:
+            self._space.clear()
+            await self._space.wait()
+        if self.closed:
+            raise ConnectionError("WebSocket outbox is closed")
+        delivered = asyncio.get_running_loop().create_future()
+        self._queue.append((message, delivered))
+        self._ready.set()
+        await delivered
+
+    def offer(self, message: str) -> bool:
+        """Queue a message without waiting; False if it was not queued"""
+        if self._evict:
+            DROPPED_MESSAGES.inc(self.policy)
+            return False
+        if self.closed:
+            return False
+        if len(self._queue) >= self.max_size:
+            DROPPED_MESSAGES.inc(self.policy)
+            if self.policy == "drop":
+                return False
+            if self.policy == "disconnect":
+                logger.warning("Disconnecting slow WebSocket consumer")
+                self._evict_consumer()
+                return False
+            if not self._drop_oldest():
+                return False
+        self._queue.append((message, None))
+        self._ready.set()
+        return True
+
+    def _evict_consumer(self):
+        # The writer is most likely stuck inside send_text, so stop it rather
+        # than waiting for it to come round, and close the socket directly
+        self._evict = True
+        self._task.cancel()
+        self._shutdown()
+        self._closer = asyncio.create_task(self._close_socket())
+
+    async def _close_socket(self):
+        try:
+            await asyncio.wait_for(
+                self.ws.close(code=SLOW_CONSUMER_CLOSE_CODE),
+                SLOW_CONSUMER_CLOSE_TIMEOUT,
+            )
+        except Exception as e:
+            logger.debug(f"Closing slow WebSocket consumer failed: {e}")
+
+    def _drop_oldest(self) -> bool:
+        # Replies someone is waiting on are never discarded
+        for index, (_, delivered) in enumerate(self._queue):
+            if delivered is None:
+                del self._queue[index]
+                return True
+        return False
+
+    async def _drain(self):
+        try:
+            while True:
+                if not self._queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                message, delivered = self._queue.popleft()
+                self._space.set()
+                self._sending = delivered
+                try:
+                    await self.ws.send_text(message)
+                except Exception as e:
+                    if delivered is not None and not delivered.done():
+                        delivered.set_exception(e)
+                    raise
+                self._sending = None
+                if delivered is not None and not delivered.done():
+                    delivered.set_result(None)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.debug(f"WebSocket writer stopped: {e}")
+        finally:
+            self._shutdown()
+
+    def _shutdown(self):
+        self.closed = True
+        self._space.set()
+        if self._sending is not None and not self._sending.done():
+            # The writer was cancelled in the middle of this message
+            self._sending.set_exception(ConnectionError("WebSocket closed"))
+        self._sending = None
+        while self._queue:
+            _, delivered = self._queue.popleft()
+            if delivered is not None and not delivered.done():
+                delivered.set_exception(ConnectionError("WebSocket closed"))
+
+    def close(self):
+        """Stop the writer task and fail any sends still waiting"""
+        self._task.cancel()
+        self._shutdown()
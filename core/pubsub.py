@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import os
+import struct
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+import msgpack
+
+logger = logging.getLogger(__name__)
+
+# Frames between workers and the broker: big-endian uint32 length + msgpack map
+LENGTH_PREFIX = struct.Struct(">I")
+# Stop queueing frames to a peer that is this far behind
+MAX_PENDING_BYTES = 8 * 1024 * 1024
+
+
+def _encode(frame: Dict[str, Any]) -> bytes:
+    payload = msgpack.packb(frame, use_bin_type=True)
+    return LENGTH_PREFIX.pack(len(payload)) + payload
+
+
+async def _read(reader: asyncio.StreamReader) -> Optional[Dict[str, Any]]:
+    try:
+        header = await reader.readexactly(LENGTH_PREFIX.size)
+        (length,) = LENGTH_PREFIX.unpack(header)
+        return msgpack.unpackb(await reader.readexactly(length), raw=False)
+    except asyncio.IncompleteReadError:
+        return None
+
+
+def _write(writer: asyncio.StreamWriter, frame: Dict[str, Any]) -> bool:
+    if writer.is_closing():
+        return False
+    if writer.transport.get_write_buffer_size() > MAX_PENDING_BYTES:
+        return False
+    writer.write(_encode(frame))
+    return True
+
+
+class Broker:
+    """Relays registrations and messages between worker processes.
+
+    Each worker keeps one Unix-socket connection to the broker. The broker
+    tracks which worker owns each session, fans broadcasts out to every
+    other worker and routes messages addressed to one session to its owner.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.workers: Dict[str, asyncio.StreamWriter] = {}
+        self.sessions: Dict[str, str] = {}
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.server = await asyncio.start_unix_server(self._handle_worker, self.path)
+        logger.info(f"Connection broker listening on {self.path}")
+
+    def start_in_thread(self) -> threading.Thread:
+        """Run the broker on its own event loop in a daemon thread"""
+        ready = threading.Event()
+
+        async def run():
+            await self.start()
+            ready.set()
+            await self.server.serve_forever()
+
+        thread = threading.Thread(
+            target=asyncio.run, args=(run(),), name="broker", daemon=True
+        )
+        thread.start()
+        ready.wait()
+        return thread
+
+    async def _handle_worker(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        hello = await _read(reader)
+        if not hello or hello.get("op") != "hello":
+            writer.close()
+            return
+        worker = hello["worker"]
+        self.workers[worker] = writer
+        logger.info(f"Worker {worker} joined the broker")
+        try:
+            while True:
+                frame = await _read(reader)
+                if frame is None:
+                    break
+                self._dispatch(worker, frame)
+        except ConnectionError:
+            pass
+        finally:
+            self.workers.pop(worker, None)
+            for session_id in [s for s, w in self.sessions.items() if w == worker]:
+                del self.sessions[session_id]
+            writer.close()
+            logger.info(f"Worker {worker} left the broker")
+
+    def _dispatch(self, worker: str, frame: Dict[str, Any]):
+        op = frame.get("op")
+        if op == "register":
+            self.sessions[frame["session_id"]] = worker
+        elif op == "unregister":
+            if self.sessions.get(frame["session_id"]) == worker:
+                del self.sessions[frame["session_id"]]
+        elif op == "broadcast":
+            for peer, writer in list(self.workers.items()):
+                if peer != worker and not _write(writer, frame):
+                    logger.warning(f"Dropped broadcast for lagging worker {peer}")
+        elif op == "send":
+            owner = self.sessions.get(frame["session_id"])
+            writer = self.workers.get(owner) if owner is not None else None
+            if writer is None or not _write(writer, frame):
+                logger.warning(f"No route to session {frame['session_id']}")
+
+
+class BrokerClient:
+    """A worker's connection to the broker, reconnecting when it drops.
+
+    Publishing never waits: frames are written to the socket buffer, and
+    dropped with a warning while the broker is unreachable.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        on_message: Callable[[Dict[str, Any]], Awaitable[None]],
+        reconnect_delay: float = 1.0,
+    ):
+        self.path = path
+        self.on_message = on_message
+        self.reconnect_delay = reconnect_delay
+        self.worker_id = str(os.getpid())
+        self.sessions: Set[str] = set()
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except OSError as e:
+                logger.warning(f"Broker unavailable at {self.path}: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            writer.write(_encode({"op": "hello", "worker": self.worker_id}))
+            # Re-announce sessions so routing survives a broker restart
+            for session_id in self.sessions:
+                writer.write(_encode({"op": "register", "session_id": session_id}))
+            self._writer = writer
+            try:
+                while True:
+                    frame = await _read(reader)
+                    if frame is None:
+                        break
+                    try:
+                        await self.on_message(frame)
+                    except Exception as e:
+                        logger.error(f"Error handling broker message: {e}")
+            except ConnectionError:
+                pass
+            finally:
+                self._writer = None
+                writer.close()
+            logger.warning("Lost connection to broker, reconnecting")
+            await asyncio.sleep(self.reconnect_delay)
+
+    def publish(self, frame: Dict[str, Any]) -> bool:
+        if self._writer is None or not _write(self._writer, frame):
+            logger.warning(f"Broker unavailable, dropped {frame.get('op')} frame")
+            return False
+        return True
+
+    def register(self, session_id: str):
+        self.sessions.add(session_id)
+        self.publish({"op": "register", "session_id": session_id})
+
+    def unregister(self, session_id: str):
+        self.sessions.discard(session_id)
+        self.publish({"op": "unregister", "session_id": session_id})
+
+    def broadcast(self, message: str) -> bool:
+        return self.publish({"op": "broadcast", "message": message})
+
+    def send(self, session_id: str, message: str) -> bool:
+        return self.publish(
+            {"op": "send", "session_id": session_id, "message": message}
+        )
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
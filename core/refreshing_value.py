@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshingValue:
+    """Cache one asynchronously loaded value with a TTL and stale-while-revalidate.
+
+    Within ``ttl`` the cached value is returned as is. Between ``ttl`` and
+    ``ttl + stale_ttl`` the stale value is returned while a background refresh
+    runs. Past that, or when forced, callers wait for a refresh. Concurrent
+    callers always share a single in-flight load.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: float,
+        stale_ttl: float = 0.0,
+        is_valid: Callable[[Any], bool] = bool,
+    ):
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.is_valid = is_valid
+        self._value: Any = None
+        self._loaded_at: Optional[float] = None
+        self._refresh: Optional[asyncio.Task] = None
+
+    @property
+    def age(self) -> Optional[float]:
+        if self._loaded_at is None:
+            return None
+        return time.monotonic() - self._loaded_at
+
+    async def get(self, force_refresh: bool = False) -> Any:
+        age = self.age
+        if not force_refresh and age is not None:
+            if age < self.ttl:
+                return self._value
+            if age < self.ttl + self.stale_ttl:
+                self._start_refresh()
+                return self._value
+        return await asyncio.shield(self._start_refresh())
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._load())
+        return self._refresh
+
+    async def _load(self) -> Any:
+        try:
+            value = await self.loader()
+        except Exception as e:
+            logger.error(f"Refresh failed: {e}")
+            value = None
+        if self.is_valid(value):
+            self._value = value
+            self._loaded_at = time.monotonic()
+            return value
+        # Keep serving the last good value when a refresh fails
+        return self._value if self._loaded_at is not None else value
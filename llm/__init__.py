@@ -1 +1,13 @@
-from .nvidia_client import NvidiaLLMClient, nvidia_service
+from .admission import (
+    AdmissionController,
+    OverloadedError,
+    RateLimitedError,
+    TokenBucket,
+    tenant_key,
+)
+from .cache import CompletionCache
+from .resilience import CircuitBreaker, CircuitOpenError, Resilience, UpstreamError
+from .router import ModelRouter, ModelLane
+from .similarity_cache import SimilarityCache
+from .singleflight import SingleFlight
+from .nvidia_client import NvidiaLLMClient, TRANSLATION_ERROR, nvidia_service
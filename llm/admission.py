@@ -0,0 +1,258 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+# Tenant used when a caller does not identify one
+DEFAULT_TENANT = "anonymous"
+# Least recently used tenants without queued calls are forgotten beyond this
+MAX_TRACKED_TENANTS = 10_000
+
+
+def tenant_key(user_id: Optional[str] = None, address: Optional[str] = None) -> str:
+    """Identify a tenant by user_id, falling back to the client address"""
+    if user_id:
+        return f"user:{user_id}"
+    if address:
+        return f"ip:{address}"
+    return DEFAULT_TENANT
+
+
+class OverloadedError(Exception):
+    """Raised when a request is shed instead of being sent upstream"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class RateLimitedError(OverloadedError):
+    """Raised when a tenant has used up its rate limit"""
+
+
+class TokenBucket:
+    """Refills ``rate`` tokens per second up to ``burst``"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self) -> float:
+        """Take a token; returns 0 on success, else seconds until one is available"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class FairQueue:
+    """Wait queue served by weighted fair queueing.
+
+    Each waiter is tagged with a virtual finish time that advances by
+    ``1 / weight`` per waiter of its tenant, and ``wake`` serves the lowest
+    tag first. A tenant with a deep backlog only delays its own waiters.
+    """
+
+    def __init__(self):
+        self.virtual_time = 0.0
+        self._order = itertools.count()
+        self._waiters: List[Tuple[float, int, asyncio.Future]] = []
+        # Virtual finish time of each tenant's last waiter, least recent first
+        self._finish: "OrderedDict[str, float]" = OrderedDict()
+
+    def push(self, tenant: str, weight: float) -> asyncio.Future:
+        finish = max(self.virtual_time, self._finish.pop(tenant, 0.0)) + 1 / weight
+        self._finish[tenant] = finish
+        if len(self._finish) > MAX_TRACKED_TENANTS:
+            # A forgotten tenant simply restarts from the current virtual time
+            self._finish.popitem(last=False)
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (finish, next(self._order), waiter))
+        return waiter
+
+    def wake(self) -> bool:
+        """Resolve the waiter with the lowest tag; False if nobody is waiting"""
+        while self._waiters:
+            finish, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                self.virtual_time = finish
+                waiter.set_result(None)
+                return True
+        return False
+
+
+class _Tenant:
+    def __init__(self, weight: float, bucket: Optional[TokenBucket]):
+        self.weight = weight
+        self.bucket = bucket
+        self.queued = 0
+
+
+class AdmissionController:
+    """Global in-flight limit for upstream calls with a bounded, per-tenant fair queue.
+
+    Requests beyond ``max_in_flight`` wait in a queue of at most ``max_queue``
+    entries (``max_tenant_queue`` per tenant) for up to their deadline. A full
+    queue or an expired deadline raises OverloadedError immediately so callers
+    can shed load.
+
+    Free slots go to waiters by weighted fair queueing (see FairQueue), so
+    an interactive user with one request in flight is served next to a batch
+    job saturating the rest.
+
+    With ``tenant_rate`` set, ``throttle`` also enforces a token bucket per
+    tenant; rate and burst scale with the tenant's weight.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queue: int,
+        queue_timeout: float,
+        max_tenant_queue: Optional[int] = None,
+        tenant_weights: Optional[Dict[str, float]] = None,
+        default_weight: float = 1.0,
+        tenant_rate: float = 0.0,
+        tenant_burst: float = 10.0,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_tenant_queue = max_tenant_queue or max_queue
+        self.tenant_weights = tenant_weights or {}
+        self.default_weight = default_weight
+        self.tenant_rate = tenant_rate
+        self.tenant_burst = tenant_burst
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.rate_limited = 0
+        self._avg_hold = 1.0
+        self._queued = 0
+        self._waiters = FairQueue()
+        self._tenants: "OrderedDict[str, _Tenant]" = OrderedDict()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    def retry_after(self) -> float:
+        """Rough time until a newly queued request would be admitted"""
+        backlog = self.queue_depth + 1
+        return self._avg_hold * backlog / max(1, self.max_in_flight)
+
+    def weight(self, tenant: Optional[str]) -> float:
+        return self._tenant(tenant).weight
+
+    def _tenant(self, tenant: Optional[str]) -> _Tenant:
+        tenant = tenant or DEFAULT_TENANT
+        state = self._tenants.get(tenant)
+        if state is not None:
+            self._tenants.move_to_end(tenant)
+            return state
+        if len(self._tenants) >= MAX_TRACKED_TENANTS:
+            self._forget_least_recent()
+        weight = self.tenant_weights.get(tenant, self.default_weight)
+        bucket = None
+        if self.tenant_rate > 0:
+            bucket = TokenBucket(
+                self.tenant_rate * weight, max(1.0, self.tenant_burst * weight)
+            )
+        state = self._tenants[tenant] = _Tenant(weight, bucket)
+        return state
+
+    def _forget_least_recent(self):
+        # Tenants with queued calls are recent, so this stops near the front.
+        # A forgotten tenant comes back with a full bucket and no backlog.
+        for tenant, state in self._tenants.items():
+            if not state.queued:
+                del self._tenants[tenant]
+                return
+
+    def throttle(self, tenant: Optional[str] = None):
+        """Charge one request to the tenant's rate limit"""
+        bucket = self._tenant(tenant).bucket
+        if bucket is None:
+            return
+        wait = bucket.take()
+        if wait > 0:
+            self.rate_limited += 1
+            raise RateLimitedError("Tenant rate limit exceeded", wait)
+
+    @asynccontextmanager
+    async def admit(
+        self, timeout: Optional[float] = None, tenant: Optional[str] = None
+    ) -> AsyncIterator[None]:
+        await self._acquire(self.queue_timeout if timeout is None else timeout, tenant)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            held = time.monotonic() - started
+            self._avg_hold = 0.9 * self._avg_hold + 0.1 * held
+            self._release()
+
+    async def _acquire(self, timeout: float, tenant: Optional[str]):
+        if self.in_flight < self.max_in_flight and not self._queued:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        state = self._tenant(tenant)
+        if self._queued >= self.max_queue or state.queued >= self.max_tenant_queue:
+            self.rejected += 1
+            raise OverloadedError("Upstream queue is full", self.retry_after())
+
+        waiter = self._waiters.push(tenant or DEFAULT_TENANT, state.weight)
+        self._queued += 1
+        state.queued += 1
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we gave up; pass it on
+                self._release()
+            else:
+                waiter.cancel()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.timed_out += 1
+            raise OverloadedError(
+                "Timed out waiting for upstream capacity", self.retry_after()
+            )
+        finally:
+            self._queued -= 1
+            state.queued -= 1
+        self.admitted += 1
+
+    def _release(self):
+        # Hand the slot straight to the waiter with the lowest tag
+        if not self._waiters.wake():
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "rate_limited": self.rate_limited,
+            "tenants_waiting": sum(1 for s in self._tenants.values() if s.queued),
+        }
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class CompletionCache:
+    """Exact-match completion cache with a memory-bounded LRU and per-entry TTL"""
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl: float,
+        deterministic_only: bool = False,
+        enabled: bool = True,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.deterministic_only = deterministic_only
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+        # key -> (value, expires_at, size)
+        self._entries: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(payload: dict) -> str:
+        """Key on (model, messages, max_tokens, temperature) only"""
+        material = json.dumps(
+            [
+                payload.get("model"),
+                payload.get("messages"),
+                payload.get("max_tokens"),
+                payload.get("temperature"),
+            ],
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def cacheable(self, payload: dict) -> bool:
+        if not self.enabled:
+            return False
+        return not self.deterministic_only or payload.get("temperature") == 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, size = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.current_bytes -= size
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: str):
+        size = sys.getsizeof(key) + sys.getsizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[2]
+            self._entries[key] = (value, time.monotonic() + self.ttl, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,12 +1,46 @@
+import asyncio
+import grpc
 import requests
 import httpx
+import importlib.util
 import json
 import logging
-from typing import Optional
+import time
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+from urllib.parse import urlsplit
 from config import settings
-import subprocess
+from core.log_pipeline import LazyJson, get_payload_logger
+from core.metrics import (
+    TRANSLATION_LATENCY,
+    UPSTREAM_LATENCY,
+    UPSTREAM_RESPONSES,
+    UPSTREAM_TTFB,
+    UPSTREAM_TTFT,
+)
+from core.refreshing_value import RefreshingValue
+from .admission import AdmissionController, OverloadedError
+from .cache import CompletionCache
+from .similarity_cache import SimilarityCache
+from .resilience import CircuitOpenError, Resilience, UpstreamError, parse_retry_after
+from .router import ModelRouter
+from .singleflight import SingleFlight
+from translation import RivaTranslationClient, TranslationBatcher, TranslationCache
 
 logger = logging.getLogger(__name__)
+payload_logger = get_payload_logger(__name__)
+
+COMPLETIONS_ENDPOINT = "chat/completions"
+TRANSLATION_ERROR = "Error during translation"
 
 
 class NvidiaLLMClient:
@@ -18,38 +52,333 @@ class NvidiaLLMClient:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
-        self.text_from = "en"
-        self.text_to = "de"
+        self.temperature = settings.TEMPERATURE
+        self.timeout = settings.UPSTREAM_TIMEOUT
+        self.router = ModelRouter(
+            self._create_async_client,
+            default_concurrency=settings.MODEL_MAX_CONCURRENCY,
+            concurrency_limits=settings.MODEL_CONCURRENCY_LIMITS,
+            allowed_models=settings.ALLOWED_MODELS,
+        )
+        self.admission = AdmissionController(
+            max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+            max_queue=settings.ADMISSION_MAX_QUEUE,
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+            max_tenant_queue=settings.TENANT_MAX_QUEUE,
+            tenant_weights=settings.TENANT_WEIGHTS,
+            default_weight=settings.TENANT_DEFAULT_WEIGHT,
+            tenant_rate=settings.TENANT_RATE_LIMIT,
+            tenant_burst=settings.TENANT_BURST,
+        )
+        self.resilience = Resilience(
+            max_attempts=settings.RETRY_MAX_ATTEMPTS,
+            base_delay=settings.RETRY_BASE_DELAY,
+            max_delay=settings.RETRY_MAX_DELAY,
+            failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.BREAKER_RESET_TIMEOUT,
+            hedge_percentile=settings.HEDGE_PERCENTILE,
+            hedge_min_samples=settings.HEDGE_MIN_SAMPLES,
+        )
+        self.session = self._create_session()
+        self.cache = CompletionCache(
+            max_bytes=settings.COMPLETION_CACHE_MAX_BYTES,
+            ttl=settings.COMPLETION_CACHE_TTL,
+            deterministic_only=settings.COMPLETION_CACHE_DETERMINISTIC_ONLY,
+            enabled=settings.COMPLETION_CACHE_ENABLED,
+        )
+        self.similarity_cache = SimilarityCache(
+            threshold=settings.SIMILARITY_CACHE_THRESHOLD,
+            max_entries=settings.SIMILARITY_CACHE_MAX_ENTRIES,
+            ttl=settings.SIMILARITY_CACHE_TTL,
+            num_perm=settings.SIMILARITY_CACHE_NUM_PERM,
+            bands=settings.SIMILARITY_CACHE_BANDS,
+            deterministic_only=settings.COMPLETION_CACHE_DETERMINISTIC_ONLY,
+            enabled=settings.SIMILARITY_CACHE_ENABLED,
+        )
+        self.inflight = SingleFlight()
+        self.translator = RivaTranslationClient(api_key=self.api_key)
+        self.translation_batcher = TranslationBatcher(
+            self.translator.translate,
+            window=settings.TRANSLATION_BATCH_WINDOW_MS / 1000,
+            max_batch=settings.TRANSLATION_MAX_BATCH,
+        )
+        self.translation_cache = TranslationCache(
+            path=settings.TRANSLATION_CACHE_PATH,
+            max_entries=settings.TRANSLATION_CACHE_MAX_ENTRIES,
+            hot_entries=settings.TRANSLATION_CACHE_HOT_ENTRIES,
+            model=settings.TRANSLATION_MODEL,
+            enabled=settings.TRANSLATION_CACHE_ENABLED,
+        )
+        self._languages = RefreshingValue(
+            self._fetch_languages,
+            ttl=settings.LANGUAGES_CACHE_TTL,
+            stale_ttl=settings.LANGUAGES_STALE_TTL,
+        )
+        # Startup warm-up progress: pending -> warming -> done (or skipped)
+        self.warmup: Dict[str, Any] = {"state": "pending", "checks": {}}
 
-    def generate_response(self, message: str, max_tokens: int = 512) -> Optional[str]:
-        """Synchronous: Generate response using NVIDIA LLM API"""
+    def _create_session(self) -> requests.Session:
+        """Pooled keep-alive session for the synchronous path"""
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=settings.UPSTREAM_MAX_CONNECTIONS
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(self.headers)
+        return session
+
+    def _create_async_client(self) -> httpx.AsyncClient:
+        http2 = settings.UPSTREAM_HTTP2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning(
+                "UPSTREAM_HTTP2 is set but 'h2' is not installed; using HTTP/1.1"
+            )
+            http2 = False
+        return httpx.AsyncClient(
+            headers=self.headers,
+            timeout=self.timeout,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.UPSTREAM_MAX_KEEPALIVE,
+                keepalive_expiry=settings.UPSTREAM_KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    async def start(self):
+        """Open the upstream connection pool for the default model"""
+        self.router.lane(self.model_name).client
+        logger.info("NVIDIA upstream connection pool opened")
+
+    async def warm_up(self):
+        """Resolve and connect to the upstream, prefetch languages and optionally
+        send a probe completion, so the first users do not pay for it.
+
+        Warm-up repeats until the upstream checks pass. Translation languages
+        are prefetched but not required, since chat works without them.
+        """
+        if not settings.WARMUP_ENABLED:
+            self.warmup["state"] = "skipped"
+            return
+        self.warmup["state"] = "warming"
+        required = ["config", "dns", "upstream"]
+        if settings.WARMUP_PROBE:
+            required.append("probe")
+        while True:
+            checks = await self._warm_up_once()
+            failed = [name for name in required if not checks[name]["ok"]]
+            if not failed:
+                break
+            self.warmup["state"] = "retrying"
+            logger.warning(
+                f"Warm-up failed ({', '.join(failed)}); "
+                f"retrying in {settings.WARMUP_RETRY_DELAY}s"
+            )
+            await asyncio.sleep(settings.WARMUP_RETRY_DELAY)
+        self.warmup["state"] = "done"
+        if not checks["languages"]["ok"]:
+            logger.warning("Warm-up complete without translation languages")
+        else:
+            logger.info("Warm-up complete")
+
+    async def _warm_up_once(self) -> Dict[str, Dict[str, Any]]:
+        checks: Dict[str, Dict[str, Any]] = {}
+        self.warmup["checks"] = checks
+
+        async def upstream_chain():
+            checks["dns"] = await self._run_check(self._resolve_upstream)
+            checks["upstream"] = await self._run_check(self._preconnect)
+            if settings.WARMUP_PROBE and checks["upstream"]["ok"]:
+                checks["probe"] = await self._run_check(self._probe_completion)
+
+        async def languages():
+            checks["languages"] = await self._run_check(self._prefetch_languages)
+
+        checks["config"] = await self._run_check(self._check_config)
         try:
-            payload = {
-                "model": self.model_name,
-                "messages": [{"role": "user", "content": message}],
-                "max_tokens": max_tokens,
-                "temperature": 0.7,
-                "stream": False,
-            }
-
-            logger.info(f"Sending request to NVIDIA API: {json.dumps(payload)}")
-
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=self.headers,
-                json=payload,
-                timeout=30,
+            await asyncio.wait_for(
+                asyncio.gather(upstream_chain(), languages()),
+                timeout=settings.WARMUP_TIMEOUT,
             )
+        except asyncio.TimeoutError:
+            logger.warning(f"Warm-up timed out after {settings.WARMUP_TIMEOUT}s")
+        expected = ["dns", "upstream", "languages"]
+        if settings.WARMUP_PROBE:
+            expected.append("probe")
+        for name in expected:
+            checks.setdefault(name, {"ok": False, "error": "not finished"})
+        return checks
+
+    @staticmethod
+    async def _run_check(check: Callable[[], Awaitable[None]]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            await check()
+        except Exception as e:
+            return {"ok": False, "error": str(e) or type(e).__name__}
+        return {"ok": True, "seconds": round(time.perf_counter() - started, 3)}
+
+    async def _check_config(self):
+        settings.validate()
+
+    async def _resolve_upstream(self):
+        url = urlsplit(self.base_url)
+        port = url.port or (443 if url.scheme == "https" else 80)
+        await asyncio.get_running_loop().getaddrinfo(url.hostname, port)
+
+    async def _preconnect(self):
+        """Open keep-alive connections in the default model's pool"""
+        client = self.router.lane(self.model_name).client
+        responses = await asyncio.gather(
+            *[
+                client.get(f"{self.base_url}/models")
+                for _ in range(settings.WARMUP_CONNECTIONS)
+            ]
+        )
+        for response in responses:
+            if response.status_code != 200:
+                raise self._upstream_error(
+                    response.status_code, response.text, response.headers
+                )
+
+    async def _prefetch_languages(self):
+        if not await self.get_languages():
+            raise RuntimeError("No translation languages available")
+
+    async def _probe_completion(self):
+        await self._complete(self._build_payload("ping", max_tokens=1))
+
+    def readiness(self) -> Tuple[bool, Dict[str, Any]]:
+        """Whether to take traffic: warm-up passed its config and upstream
+        checks, and the default model's circuit breaker is not open"""
+        breaker = self.resilience.breaker(self.model_name, COMPLETIONS_ENDPOINT)
+        warmed = self.warmup["state"] in ("done", "skipped")
+        ready = warmed and breaker.state != "open"
+        if ready:
+            status = "ready"
+        elif not warmed:
+            status = "warming"
+        else:
+            status = "unavailable"
+        return ready, {
+            "status": status,
+            "warmup": self.warmup,
+            "upstream": {
+                "model": self.model_name,
+                "breaker": breaker.state,
+                "admission": self.admission.stats(),
+            },
+        }
+
+    async def aclose(self):
+        """Close every per-model upstream pool and the sync session"""
+        await self.router.aclose()
+        self.session.close()
+        await self.translator.aclose()
+        self.translation_cache.close()
+        logger.info("NVIDIA upstream connection pool closed")
+
+    def _build_payload(
+        self,
+        message: str,
+        max_tokens: int = 512,
+        stream: bool = False,
+        history: Optional[List[Dict[str, str]]] = None,
+        model: Optional[str] = None,
+    ) -> dict:
+        return {
+            "model": model or self.model_name,
+            "messages": (history or []) + [{"role": "user", "content": message}],
+            "max_tokens": max_tokens,
+            "temperature": self.temperature,
+            "stream": stream,
+        }
+
+    @staticmethod
+    def _parse_stream_line(line: str) -> Optional[str]:
+        """Extract the content delta from one OpenAI-compatible SSE line"""
+        line = line.strip()
+        if not line.startswith("data:"):
+            return None
+        data = line[len("data:") :].strip()
+        if not data or data == "[DONE]":
+            return None
+        try:
+            chunk = json.loads(data)
+            return chunk["choices"][0].get("delta", {}).get("content")
+        except (json.JSONDecodeError, KeyError, IndexError) as e:
+            logger.warning(f"Skipping malformed stream chunk: {e}")
+            return None
+
+    def _cached_completion(self, payload: dict) -> Optional[str]:
+        """Look the payload up in the exact cache, then the near-duplicate cache"""
+        cached = None
+        if self.cache.cacheable(payload):
+            cached = self.cache.get(self.cache.make_key(payload))
+        if cached is None and self.similarity_cache.cacheable(payload):
+            cached = self.similarity_cache.get(payload)
+        return cached
+
+    def _store_completion(self, payload: dict, content: str, latency: float):
+        if self.cache.cacheable(payload):
+            self.cache.put(self.cache.make_key(payload), content)
+        if self.similarity_cache.cacheable(payload):
+            self.similarity_cache.put(payload, content, latency)
+
+    def _fallback_payload(self, payload: dict) -> Optional[dict]:
+        fallback = settings.FALLBACK_MODEL
+        if not fallback or fallback == payload["model"]:
+            return None
+        return dict(payload, model=fallback)
+
+    @staticmethod
+    def _record_upstream(model: str, status, started: float):
+        UPSTREAM_RESPONSES.inc(model, str(status))
+        UPSTREAM_LATENCY.observe(time.perf_counter() - started, model)
+
+    @staticmethod
+    def _upstream_error(status_code: int, body: str, headers) -> UpstreamError:
+        return UpstreamError(
+            status_code, body, parse_retry_after(headers.get("Retry-After"))
+        )
+
+    def generate_response(
+        self,
+        message: str,
+        max_tokens: int = 512,
+        history: Optional[List[Dict[str, str]]] = None,
+    ) -> Optional[str]:
+        """Synchronous: Generate response using NVIDIA LLM API"""
+        try:
+            payload = self._build_payload(message, max_tokens, history=history)
+            cached = self._cached_completion(payload)
+            if cached is not None:
+                return cached
+            started = time.perf_counter()
+
+            payload_logger.info("Sending request to NVIDIA API: %s", LazyJson(payload))
 
-            logger.info(f"Received response from NVIDIA API: {response}")
+            try:
+                content = self._complete_sync(payload)
+            except (
+                UpstreamError,
+                CircuitOpenError,
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ) as e:
+                fallback = self._fallback_payload(payload)
+                if fallback is None:
+                    raise
+                logger.warning(f"Falling back to {fallback['model']}: {e}")
+                content = self._complete_sync(fallback)
 
-            if response.status_code == 200:
-                data = response.json()
-                return data["choices"][0]["message"]["content"].strip()
-            else:
-                logger.error(f"API Error: {response.status_code} - {response.text}")
-                return "Sorry, I'm having trouble processing your request right now."
+            self._store_completion(payload, content, time.perf_counter() - started)
+            return content
 
+        except (UpstreamError, CircuitOpenError) as e:
+            logger.error(f"API Error: {e}")
+            return "Sorry, I'm having trouble processing your request right now."
         except requests.exceptions.RequestException as e:
             logger.error(f"Request failed: {e}")
             return "Sorry, I'm currently unavailable. Please try again later."
@@ -57,116 +386,307 @@ class NvidiaLLMClient:
             logger.error(f"Unexpected error: {e}")
             return "An unexpected error occurred. Please try again."
 
+    def _complete_sync(self, payload: dict) -> str:
+        """POST one completion with retries and the circuit breaker (no hedging)"""
+        attempt = 0
+        while True:
+            breaker = self.resilience.check(payload["model"], COMPLETIONS_ENDPOINT)
+            started = time.perf_counter()
+            try:
+                try:
+                    response = self.session.post(
+                        f"{self.base_url}/chat/completions",
+                        json=payload,
+                        timeout=self.timeout,
+                    )
+                except requests.exceptions.RequestException:
+                    self._record_upstream(payload["model"], "error", started)
+                    raise
+                self._record_upstream(payload["model"], response.status_code, started)
+
+                logger.debug("Received response from NVIDIA API: %s", response)
+
+                if response.status_code != 200:
+                    raise self._upstream_error(
+                        response.status_code, response.text, response.headers
+                    )
+                breaker.record_success()
+                return response.json()["choices"][0]["message"]["content"].strip()
+            except Exception as e:
+                self.resilience.record_error(breaker, e)
+                delay = self.resilience.retry_delay(attempt, e)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+
     async def async_generate_response(
-        self, message: str, max_tokens: int = 512
+        self,
+        message: str,
+        max_tokens: int = 512,
+        history: Optional[List[Dict[str, str]]] = None,
+        model: Optional[str] = None,
+        tenant: Optional[str] = None,
     ) -> Optional[str]:
         """Asynchronous: Generate response using NVIDIA LLM API"""
-        payload = {
-            "model": self.model_name,
-            "messages": [{"role": "user", "content": message}],
-            "max_tokens": max_tokens,
-            "temperature": 0.7,
-            "stream": False,
-        }
+        payload = self._build_payload(message, max_tokens, history=history, model=model)
+        cached = self._cached_completion(payload)
+        if cached is not None:
+            return cached
+        self.admission.throttle(tenant)
+        if not settings.COALESCE_REQUESTS:
+            return await self._async_request(payload, tenant)
+        return await self.inflight.do(
+            self.cache.make_key(payload), lambda: self._async_request(payload, tenant)
+        )
+
+    async def _async_request(self, payload: dict, tenant: Optional[str] = None) -> str:
+        started = time.perf_counter()
 
-        logger.info(f"Sending async request to NVIDIA API: {json.dumps(payload)}")
+        payload_logger.info(
+            "Sending async request to NVIDIA API: %s", LazyJson(payload)
+        )
 
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
+            try:
+                content = await self._complete(payload, tenant)
+            except (UpstreamError, CircuitOpenError, httpx.TransportError) as e:
+                fallback = self._fallback_payload(payload)
+                if fallback is None:
+                    raise
+                logger.warning(f"Falling back to {fallback['model']}: {e}")
+                content = await self._complete(fallback, tenant)
+
+            self._store_completion(payload, content, time.perf_counter() - started)
+            return content
+
+        except (UpstreamError, CircuitOpenError) as e:
+            logger.error(f"API Error: {e}")
+            return "Sorry, I'm having trouble processing your request right now."
+        except httpx.RequestError as e:
+            logger.error(f"Async request failed: {e}")
+            return "Sorry, I'm currently unavailable. Please try again later."
+        except OverloadedError:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected async error: {e}")
+            return "An unexpected error occurred. Please try again."
+
+    async def _complete(self, payload: dict, tenant: Optional[str] = None) -> str:
+        """One completion through retries, hedging and the circuit breaker"""
+        return await self.resilience.call(
+            payload["model"],
+            COMPLETIONS_ENDPOINT,
+            lambda: self._post_completion(payload, tenant),
+        )
+
+    @asynccontextmanager
+    async def _upstream_slot(
+        self, model: str, tenant: Optional[str] = None
+    ) -> AsyncIterator[httpx.AsyncClient]:
+        """Take the model's lane slot, then a global admission slot, within one deadline.
+
+        Waiting on a busy model never holds a global slot, so one model's
+        backlog cannot shed requests for another.
+        """
+        deadline = time.monotonic() + self.admission.queue_timeout
+        async with self.router.lane(model).slot(
+            timeout=self.admission.queue_timeout,
+            tenant=tenant,
+            weight=self.admission.weight(tenant),
+        ) as client:
+            async with self.admission.admit(
+                timeout=max(0.0, deadline - time.monotonic()), tenant=tenant
+            ):
+                yield client
+
+    async def _post_completion(
+        self, payload: dict, tenant: Optional[str] = None
+    ) -> str:
+        async with self._upstream_slot(payload["model"], tenant) as client:
+            started = time.perf_counter()
+            try:
                 response = await client.post(
                     f"{self.base_url}/chat/completions",
-                    headers=self.headers,
                     json=payload,
                 )
+            except httpx.TransportError:
+                self._record_upstream(payload["model"], "error", started)
+                raise
+        self._record_upstream(payload["model"], response.status_code, started)
+
+        logger.debug("Received async response from NVIDIA API: %s", response)
+
+        if response.status_code != 200:
+            raise self._upstream_error(
+                response.status_code, response.text, response.headers
+            )
+        return response.json()["choices"][0]["message"]["content"].strip()
+
+    async def async_stream_response(
+        self,
+        message: str,
+        max_tokens: int = 512,
+        history: Optional[List[Dict[str, str]]] = None,
+        model: Optional[str] = None,
+        tenant: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Asynchronous: Yield response deltas from the NVIDIA LLM API as they arrive"""
+        payload = self._build_payload(
+            message, max_tokens, stream=True, history=history, model=model
+        )
+        cached = self._cached_completion(payload)
+        if cached is not None:
+            yield cached
+            return
+        self.admission.throttle(tenant)
+        if settings.COALESCE_REQUESTS:
+            deltas = self.inflight.stream(
+                self.cache.make_key(payload),
+                lambda: self._async_stream_request(payload, tenant),
+            )
+        else:
+            deltas = self._async_stream_request(payload, tenant)
+        async for delta in deltas:
+            yield delta
+
+    async def _async_stream_request(
+        self, payload: dict, tenant: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        started = time.perf_counter()
+        sent_any = False
+        chunks = []
 
-            logger.info(f"Received async response from NVIDIA API: {response}")
+        payload_logger.info(
+            "Sending async streaming request to NVIDIA API: %s", LazyJson(payload)
+        )
 
-            if response.status_code == 200:
-                data = response.json()
-                return data["choices"][0]["message"]["content"].strip()
-            else:
-                logger.error(f"API Error: {response.status_code} - {response.text}")
-                return "Sorry, I'm having trouble processing your request right now."
+        try:
+            candidates = [payload]
+            fallback = self._fallback_payload(payload)
+            if fallback is not None:
+                candidates.append(fallback)
+            for candidate in candidates:
+                try:
+                    async for delta in self._stream_with_retries(candidate, tenant):
+                        sent_any = True
+                        chunks.append(delta)
+                        yield delta
+                    break
+                except (UpstreamError, CircuitOpenError, httpx.TransportError) as e:
+                    if sent_any or candidate is candidates[-1]:
+                        raise
+                    logger.warning(f"Falling back to {fallback['model']}: {e}")
+
+            if chunks:
+                self._store_completion(
+                    payload, "".join(chunks), time.perf_counter() - started
+                )
 
+        except (UpstreamError, CircuitOpenError) as e:
+            logger.error(f"API Error: {e}")
+            if not sent_any:
+                yield "Sorry, I'm having trouble processing your request right now."
         except httpx.RequestError as e:
-            logger.error(f"Async request failed: {e}")
-            return "Sorry, I'm currently unavailable. Please try again later."
+            logger.error(f"Async streaming request failed: {e}")
+            if not sent_any:
+                yield "Sorry, I'm currently unavailable. Please try again later."
+        except OverloadedError:
+            raise
         except Exception as e:
-            logger.error(f"Unexpected async error: {e}")
-            return "An unexpected error occurred. Please try again."
+            logger.error(f"Unexpected async streaming error: {e}")
+            if not sent_any:
+                yield "An unexpected error occurred. Please try again."
+
+    async def _stream_with_retries(
+        self, payload: dict, tenant: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Open a completion stream, retrying only until the first byte arrives"""
+        attempt = 0
+        while True:
+            breaker = self.resilience.check(payload["model"], COMPLETIONS_ENDPOINT)
+            streaming = False
+            try:
+                async with self._upstream_slot(payload["model"], tenant) as client:
+                    started = time.perf_counter()
+                    status = "error"
+                    try:
+                        async with client.stream(
+                            "POST",
+                            f"{self.base_url}/chat/completions",
+                            json=payload,
+                        ) as response:
+                            status = response.status_code
+                            UPSTREAM_TTFB.observe(
+                                time.perf_counter() - started, payload["model"]
+                            )
+                            if response.status_code != 200:
+                                body = await response.aread()
+                                raise self._upstream_error(
+                                    response.status_code,
+                                    body.decode(errors="replace"),
+                                    response.headers,
+                                )
+                            breaker.record_success()
+                            streaming = True
+                            first = True
+                            async for line in response.aiter_lines():
+                                delta = self._parse_stream_line(line)
+                                if delta:
+                                    if first:
+                                        first = False
+                                        UPSTREAM_TTFT.observe(
+                                            time.perf_counter() - started,
+                                            payload["model"],
+                                        )
+                                    yield delta
+                    finally:
+                        self._record_upstream(payload["model"], status, started)
+                return
+            except (asyncio.CancelledError, GeneratorExit):
+                if not streaming:
+                    # Release a half-open probe so the breaker can try again
+                    breaker.abandon()
+                raise
+            except Exception as e:
+                if streaming:
+                    raise
+                self.resilience.record_error(breaker, e)
+                delay = self.resilience.retry_delay(attempt, e)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
 
     async def translate_text(
         self, text: str, text_from: str = "en", text_to: str = "de"
     ) -> str:
-        command = [
-            "python",
-            "python-clients/scripts/nmt/nmt.py",
-            "--server",
-            "grpc.nvcf.nvidia.com:443",
-            "--use-ssl",
-            "--metadata",
-            "function-id",
-            "0778f2eb-b64d-45e7-acae-7dd9b9b35b4d",
-            "--metadata",
-            "authorization",
-            f"Bearer {self.api_key}",
-            "--text",
-            f"{text}",
-            "--source-language-code",
-            f"{text_from}",
-            "--target-language-code",
-            f"{text_to}",
-        ]
+        started = time.perf_counter()
         try:
-            print("Running translation command:", " ".join(command))
-            result = subprocess.run(command, capture_output=True, text=True, check=True)
-            print("STDOUT:", result.stdout)
-            print("STDERR:", result.stderr)
-            return result.stdout
-        except subprocess.CalledProcessError as e:
-            print("Error running command:", e)
-            print("STDOUT:", e.stdout)
-            print("STDERR:", e.stderr)
-            return "Error during translation"
-
-    async def get_languages(self) -> dict:
-        """List available translation models/languages using the Riva NMT CLI."""
-        command = [
-            "python",
-            "python-clients/scripts/nmt/nmt.py",
-            "--server",
-            "grpc.nvcf.nvidia.com:443",
-            "--use-ssl",
-            "--metadata",
-            "function-id",
-            "0778f2eb-b64d-45e7-acae-7dd9b9b35b4d",
-            "--metadata",
-            "authorization",
-            f"Bearer {self.api_key}",
-            "--list-models",
-        ]
+            cached = await self.translation_cache.get(text, text_from, text_to)
+            if cached is not None:
+                return cached
+            translated = await self.translation_batcher.translate(
+                text, text_from, text_to
+            )
+            self.translation_cache.put(text, text_from, text_to, translated)
+            return translated
+        except (grpc.RpcError, ValueError) as e:
+            logger.error(f"Translation failed: {e}")
+            return TRANSLATION_ERROR
+        finally:
+            TRANSLATION_LATENCY.observe(time.perf_counter() - started)
+
+    async def get_languages(self, force_refresh: bool = False) -> dict:
+        """List available translation languages, cached with stale-while-revalidate."""
+        return await self._languages.get(force_refresh=force_refresh)
+
+    async def _fetch_languages(self) -> dict:
         try:
-            result = subprocess.run(command, capture_output=True, text=True, check=True)
-            print("STDOUT:", result.stdout)
-            return self._parse_languages(result.stdout)
-        except subprocess.CalledProcessError as e:
-            print("Error running command:", e)
-            print("STDOUT:", e.stdout)
-            print("STDERR:", e.stderr)
+            return await self.translator.list_languages()
+        except grpc.RpcError as e:
+            logger.error(f"Listing translation languages failed: {e}")
             return {}
 
-    def _parse_languages(self, raw_output: str):
-        src_langs = set()
-        tgt_langs = set()
-        for line in raw_output.splitlines():
-            line = line.strip()
-            if line.startswith("src_lang:"):
-                lang = line.split("src_lang:")[1].strip().strip('"')
-                src_langs.add(lang)
-            elif line.startswith("tgt_lang:"):
-                lang = line.split("tgt_lang:")[1].strip().strip('"')
-                tgt_langs.add(lang)
-        return {"from_text": sorted(src_langs), "to_text": sorted(tgt_langs)}
-
 
 nvidia_service = NvidiaLLMClient()
@@ -0,0 +1,277 @@
+import asyncio
+import email.utils
+import logging
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+import httpx
+import requests
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+UPSTREAM_RETRIES = metrics.counter(
+    "chatbot_upstream_retries_total", "Upstream attempts retried after a failure"
+)
+UPSTREAM_HEDGES = metrics.counter(
+    "chatbot_upstream_hedges_total", "Hedged upstream requests sent", ["model"]
+)
+UPSTREAM_HEDGE_WINS = metrics.counter(
+    "chatbot_upstream_hedge_wins_total",
+    "Hedged upstream requests answered before the original attempt",
+    ["model"],
+)
+
+
+class UpstreamError(Exception):
+    """Non-200 response from the upstream API"""
+
+    def __init__(
+        self, status_code: int, body: str, retry_after: Optional[float] = None
+    ):
+        super().__init__(f"{status_code} - {body}")
+        self.status_code = status_code
+        self.body = body
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status_code == 429 or self.status_code >= 500
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open"""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def abandon(self):
+        """Forget an in-progress half-open probe that was cancelled"""
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._probing:
+                logger.warning("Circuit breaker opened after upstream failures")
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies for percentile estimates"""
+
+    def __init__(self, size: int = 200):
+        self._window: Deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._window)
+
+    def record(self, seconds: float):
+        self._window.append(seconds)
+
+    def percentile(self, p: float) -> float:
+        ordered = sorted(self._window)
+        index = min(len(ordered) - 1, int(len(ordered) * p / 100))
+        return ordered[index]
+
+
+class Resilience:
+    """Retries with capped exponential backoff and jitter, hedged requests and
+    a circuit breaker per (model, endpoint) for upstream calls.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int,
+        base_delay: float,
+        max_delay: float,
+        failure_threshold: int,
+        reset_timeout: float,
+        hedge_percentile: float = 0.0,
+        hedge_min_samples: int = 20,
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+        self.latencies: Dict[str, LatencyTracker] = {}
+
+    def breaker(self, model: str, endpoint: str) -> CircuitBreaker:
+        key = (model, endpoint)
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            self.breakers[key] = breaker
+        return breaker
+
+    def check(self, model: str, endpoint: str) -> CircuitBreaker:
+        """Return the breaker for this upstream, raising if it is open"""
+        breaker = self.breaker(model, endpoint)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {model} {endpoint}")
+        return breaker
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        if isinstance(error, UpstreamError):
+            return error.retryable
+        return isinstance(
+            error,
+            (
+                httpx.TransportError,
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ),
+        )
+
+    def record_error(self, breaker: CircuitBreaker, error: Exception):
+        if self.is_retryable(error):
+            breaker.record_failure()
+        elif isinstance(error, UpstreamError):
+            # The upstream answered, so it is healthy even if it refused
+            breaker.record_success()
+        else:
+            breaker.abandon()
+
+    def retry_delay(self, attempt: int, error: Exception) -> Optional[float]:
+        """Backoff before the next attempt, or None when the call should not be retried"""
+        if attempt + 1 >= self.max_attempts or not self.is_retryable(error):
+            return None
+        backoff = min(self.max_delay, self.base_delay * (2**attempt))
+        delay = random.uniform(0, backoff)
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            if retry_after > self.max_delay:
+                return None
+            delay = max(delay, retry_after)
+        UPSTREAM_RETRIES.inc()
+        return delay
+
+    def record_latency(self, model: str, seconds: float):
+        tracker = self.latencies.get(model)
+        if tracker is None:
+            tracker = self.latencies[model] = LatencyTracker()
+        tracker.record(seconds)
+
+    def hedge_delay(self, model: str) -> Optional[float]:
+        if self.hedge_percentile <= 0:
+            return None
+        tracker = self.latencies.get(model)
+        if tracker is None or len(tracker) < self.hedge_min_samples:
+            return None
+        return tracker.percentile(self.hedge_percentile)
+
+    async def call(
+        self, model: str, endpoint: str, fn: Callable[[], Awaitable[T]]
+    ) -> T:
+        """Run fn through the breaker, hedging and retry policy for this upstream"""
+        attempt = 0
+        while True:
+            breaker = self.check(model, endpoint)
+            started = time.monotonic()
+            try:
+                result = await self._hedged(model, fn)
+            except asyncio.CancelledError:
+                breaker.abandon()
+                raise
+            except Exception as e:
+                self.record_error(breaker, e)
+                delay = self.retry_delay(attempt, e)
+                if delay is None:
+                    raise
+                logger.warning(
+                    f"Upstream {model} attempt {attempt + 1} failed ({e}); retrying in {delay:.2f}s"
+                )
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            breaker.record_success()
+            self.record_latency(model, time.monotonic() - started)
+            return result
+
+    async def _hedged(self, model: str, fn: Callable[[], Awaitable[T]]) -> T:
+        delay = self.hedge_delay(model)
+        if delay is None:
+            return await fn()
+
+        primary = asyncio.ensure_future(fn())
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                return primary.result()
+
+            UPSTREAM_HEDGES.inc(model)
+            hedge = asyncio.ensure_future(fn())
+            tasks.append(hedge)
+            pending = {primary, hedge}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            UPSTREAM_HEDGE_WINS.inc(model)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Also covers the caller being cancelled, so no attempt is orphaned
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
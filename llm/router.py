@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Iterable, Optional
+import httpx
+from .admission import DEFAULT_TENANT, FairQueue, OverloadedError
+
+logger = logging.getLogger(__name__)
+
+
+class ModelLane:
+    """Connection pool, concurrency limit and tenant-fair wait queue for one upstream model"""
+
+    def __init__(
+        self,
+        model: str,
+        client_factory: Callable[[], httpx.AsyncClient],
+        max_concurrency: int,
+    ):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self.waiting = 0
+        self._client_factory = client_factory
+        self._client: Optional[httpx.AsyncClient] = None
+        self._waiters = FairQueue()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = self._client_factory()
+        return self._client
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        timeout: Optional[float] = None,
+        tenant: Optional[str] = None,
+        weight: float = 1.0,
+    ) -> AsyncIterator[httpx.AsyncClient]:
+        """Wait for a free slot on this model and yield its pooled client"""
+        await self._acquire(timeout, tenant or DEFAULT_TENANT, weight)
+        try:
+            yield self.client
+        finally:
+            self._release()
+
+    async def _acquire(self, timeout: Optional[float], tenant: str, weight: float):
+        if self.active < self.max_concurrency and not self.waiting:
+            self.active += 1
+            return
+        waiter = self._waiters.push(tenant, weight)
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we gave up; pass it on
+                self._release()
+            else:
+                waiter.cancel()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise OverloadedError(
+                f"Timed out waiting for {self.model} capacity",
+                max(1.0, self.waiting / self.max_concurrency),
+            )
+        finally:
+            self.waiting -= 1
+
+    def _release(self):
+        # Hand the slot straight to the waiter with the lowest tag
+        if not self._waiters.wake():
+            self.active -= 1
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class ModelRouter:
+    """Route upstream calls to a lane per model so slow models cannot starve fast ones.
+
+    With ``allowed_models`` set, lanes are only opened for those models, so
+    clients cannot grow the set of pools, breakers and metric series.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], httpx.AsyncClient],
+        default_concurrency: int,
+        concurrency_limits: Optional[Dict[str, int]] = None,
+        allowed_models: Optional[Iterable[str]] = None,
+    ):
+        self.client_factory = client_factory
+        self.default_concurrency = default_concurrency
+        self.concurrency_limits = concurrency_limits or {}
+        self.allowed_models = set(allowed_models) if allowed_models else None
+        self.lanes: Dict[str, ModelLane] = {}
+
+    def is_allowed(self, model: str) -> bool:
+        return self.allowed_models is None or model in self.allowed_models
+
+    def lane(self, model: str) -> ModelLane:
+        lane = self.lanes.get(model)
+        if lane is None:
+            if not self.is_allowed(model):
+                raise ValueError(f"Model not allowed: {model}")
+            limit = self.concurrency_limits.get(model, self.default_concurrency)
+            lane = ModelLane(model, self.client_factory, limit)
+            self.lanes[model] = lane
+            logger.info(f"Opened upstream lane for {model} (concurrency {limit})")
+        return lane
+
+    async def aclose(self):
+        for lane in self.lanes.values():
+            await lane.aclose()
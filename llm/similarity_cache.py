@@ -0,0 +1,222 @@
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+from core.metrics import metrics
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+LATENCY_SAVED = metrics.counter(
+    "chatbot_similarity_cache_latency_saved_seconds_total",
+    "Upstream latency avoided by near-duplicate cache hits",
+)
+_CONTRACTIONS = {
+    "what's": "what is",
+    "who's": "who is",
+    "where's": "where is",
+    "how's": "how is",
+    "it's": "it is",
+    "that's": "that is",
+    "there's": "there is",
+    "let's": "let us",
+    "can't": "cannot",
+    "won't": "will not",
+}
+_SUFFIXES = (
+    ("n't", " not"),
+    ("'re", " are"),
+    ("'m", " am"),
+    ("'ll", " will"),
+    ("'ve", " have"),
+    ("'d", " would"),
+)
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def normalize_prompt(text: str) -> str:
+    """Lowercase, expand common contractions and strip punctuation"""
+    words = []
+    for word in text.lower().replace("’", "'").split():
+        stripped = word.strip('.,!?;:"()')
+        if stripped in _CONTRACTIONS:
+            word = _CONTRACTIONS[stripped]
+        else:
+            for suffix, expansion in _SUFFIXES:
+                if stripped.endswith(suffix):
+                    word = stripped[: -len(suffix)] + expansion
+                    break
+        words.append(word)
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", " ".join(words))).strip()
+
+
+class _Entry:
+    __slots__ = ("scope", "signature", "response", "latency", "expires_at")
+
+    def __init__(self, scope, signature, response, latency, expires_at):
+        self.scope = scope
+        self.signature = signature
+        self.response = response
+        self.latency = latency
+        self.expires_at = expires_at
+
+
+class SimilarityCache:
+    """Near-duplicate prompt cache using MinHash signatures and an LSH band index.
+
+    Only single-turn requests are considered, and prompts are compared within
+    the same (model, max_tokens, temperature) scope. Everything runs locally.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        max_entries: int = 10000,
+        ttl: float = 600,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 3,
+        deterministic_only: bool = False,
+        enabled: bool = True,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.deterministic_only = deterministic_only
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+        rng = random.Random(1)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._buckets: Dict[Tuple, Set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _scope_and_prompt(payload: dict) -> Optional[Tuple[Tuple, str]]:
+        messages = payload.get("messages") or []
+        if len(messages) != 1 or messages[0].get("role") != "user":
+            return None
+        prompt = messages[0].get("content", "")
+        # Numbers must match exactly: "5 mg" and "50 mg" are near-identical
+        # as shingles but need different answers
+        scope = (
+            payload.get("model"),
+            payload.get("max_tokens"),
+            payload.get("temperature"),
+            tuple(_NUMBER.findall(prompt)),
+        )
+        return scope, prompt
+
+    def cacheable(self, payload: dict) -> bool:
+        if not self.enabled:
+            return False
+        if self.deterministic_only and payload.get("temperature") != 0:
+            return False
+        return self._scope_and_prompt(payload) is not None
+
+    def _shingles(self, text: str) -> Set[bytes]:
+        data = text.encode("utf-8")
+        k = self.shingle_size
+        if len(data) <= k:
+            return {data}
+        return {data[i : i + k] for i in range(len(data) - k + 1)}
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s, digest_size=8).digest(), "little")
+            for s in self._shingles(normalize_prompt(text))
+        ]
+        return tuple(
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms
+        )
+
+    def _band_keys(self, scope: Tuple, signature: Tuple[int, ...]) -> List[Tuple]:
+        return [
+            (scope, band, signature[band * self.rows : (band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+    def get(self, payload: dict) -> Optional[str]:
+        parsed = self._scope_and_prompt(payload)
+        if parsed is None:
+            return None
+        scope, prompt = parsed
+        signature = self.signature(prompt)
+        now = time.monotonic()
+        with self._lock:
+            candidates: Set[int] = set()
+            for key in self._band_keys(scope, signature):
+                candidates.update(self._buckets.get(key, ()))
+            best: Optional[_Entry] = None
+            best_id = None
+            best_score = 0.0
+            for entry_id in candidates:
+                entry = self._entries[entry_id]
+                if entry.expires_at <= now:
+                    continue
+                score = (
+                    sum(x == y for x, y in zip(signature, entry.signature))
+                    / self.num_perm
+                )
+                if score > best_score:
+                    best, best_id, best_score = entry, entry_id, score
+            if best is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            self.latency_saved += best.latency
+            LATENCY_SAVED.inc(amount=best.latency)
+            return best.response
+
+    def put(self, payload: dict, response: str, latency: float = 0.0):
+        parsed = self._scope_and_prompt(payload)
+        if parsed is None:
+            return
+        scope, prompt = parsed
+        signature = self.signature(prompt)
+        expires_at = time.monotonic() + self.ttl
+        entry = _Entry(scope, signature, response, latency, expires_at)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = entry
+            for key in self._band_keys(scope, signature):
+                self._buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        for key in self._band_keys(entry.scope, entry.signature):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "latency_saved_seconds": round(self.latency_saved, 3),
+        }
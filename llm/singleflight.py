@@ -0,0 +1,107 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+from core.metrics import metrics
+
+COALESCED_CALLS = metrics.counter(
+    "chatbot_coalesced_calls_total",
+    "Calls that started an upstream request (leader) or joined one in flight (follower)",
+    ["role"],
+)
+
+
+class _SharedStream:
+    """Buffer of chunks from one upstream stream that any number of readers replay"""
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def pump(self, source: AsyncIterator[str]):
+        try:
+            async for chunk in source:
+                self.chunks.append(chunk)
+                self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+class SingleFlight:
+    """Coalesce identical in-flight async calls and token streams onto one upstream call"""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._streams: Dict[str, _SharedStream] = {}
+        # Strong references so stream pumps are not garbage-collected
+        self._pumps: Set[asyncio.Task] = set()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls) + len(self._streams)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable]):
+        """Run fn once for all concurrent callers with the same key"""
+        task = self._calls.get(key)
+        if task is not None:
+            COALESCED_CALLS.inc("follower")
+        else:
+            COALESCED_CALLS.inc("leader")
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._forget(self._calls, key, t))
+        # Shield so one caller cancelling does not cancel the shared call
+        return await asyncio.shield(task)
+
+    async def stream(
+        self, key: str, factory: Callable[[], AsyncIterator[str]]
+    ) -> AsyncIterator[str]:
+        """Attach to an identical in-flight stream, or start one and share it"""
+        shared = self._streams.get(key)
+        if shared is not None:
+            COALESCED_CALLS.inc("follower")
+        else:
+            COALESCED_CALLS.inc("leader")
+            shared = _SharedStream()
+            self._streams[key] = shared
+            task = shared.task = asyncio.ensure_future(shared.pump(factory()))
+            self._pumps.add(task)
+            task.add_done_callback(self._pumps.discard)
+            task.add_done_callback(lambda _: self._forget(self._streams, key, shared))
+        shared.subscribers += 1
+        try:
+            async for chunk in shared.subscribe():
+                yield chunk
+        finally:
+            shared.subscribers -= 1
+            if not shared.subscribers and not shared.done:
+                # Nobody is reading any more: stop the upstream call so it
+                # releases its slots, and keep new callers off the dead stream
+                self._forget(self._streams, key, shared)
+                shared.task.cancel()
+
+    @staticmethod
+    def _forget(registry: dict, key: str, value):
+        if registry.get(key) is value:
+            del registry[key]
@@ -2,13 +2,11 @@ import logging
 import sys
 import uvicorn
 from config import settings
+from core.log_pipeline import setup_logging, start_log_receiver
+from core.pubsub import Broker
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("chatbot.log"), logging.StreamHandler(sys.stdout)],
-)
+# Configure logging: records are written by a background thread
+setup_logging()
 
 logger = logging.getLogger(__name__)
 
@@ -21,8 +19,20 @@ def main():
 
         logger.info("Starting FastAPI chatbot server...")
 
+        if settings.WORKERS > 1:
+            # Workers find each other's connections through this broker
+            Broker(settings.BROKER_SOCKET).start_in_thread()
+            # Workers' records end up in this process' rotating log file
+            start_log_receiver()
+
         # Start server with Uvicorn
-        uvicorn.run("app:app", host="0.0.0.0", port=8000, log_level="info")
+        uvicorn.run(
+            "app:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=settings.WORKERS,
+            log_level="info",
+        )
 
     except ValueError as e:
         logger.error(f"Configuration error: {e}")
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import struct
+from typing import Any, Dict, Optional, Union
+import msgpack
+
+# msgpack frames are prefixed with their payload length as a big-endian uint32
+LENGTH_PREFIX = struct.Struct(">I")
+
+
+class FrameTooLarge(Exception):
+    """Raised when a client sends a frame over the configured size limit"""
+
+
+class JsonCodec:
+    """Newline-delimited JSON, the default protocol"""
+
+    name = "json"
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        return (json.dumps(message) + "\n").encode("utf-8")
+
+    def encode_delta(self, delta: str) -> bytes:
+        return self.encode({"type": "delta", "message": delta})
+
+    def decode(self, payload: bytes) -> Any:
+        return json.loads(payload)
+
+    async def read(
+        self, reader: asyncio.StreamReader, max_bytes: int
+    ) -> Optional[bytes]:
+        """Read one frame, or None at end of stream"""
+        try:
+            line = await reader.readline()
+        except (asyncio.LimitOverrunError, ValueError):
+            raise FrameTooLarge()
+        return line or None
+
+
+class MsgpackCodec:
+    """Length-prefixed msgpack frames.
+
+    Streaming deltas are sent as a bare msgpack string rather than a map, so
+    high-rate streams pay only the prefix and the text per token.
+    """
+
+    name = "msgpack"
+
+    def encode(self, message: Any) -> bytes:
+        payload = msgpack.packb(message, use_bin_type=True)
+        return LENGTH_PREFIX.pack(len(payload)) + payload
+
+    def encode_delta(self, delta: str) -> bytes:
+        return self.encode(delta)
+
+    def decode(self, payload: bytes) -> Any:
+        return msgpack.unpackb(payload, raw=False)
+
+    async def read(
+        self, reader: asyncio.StreamReader, max_bytes: int
+    ) -> Optional[bytes]:
+        """Read one frame, or None at end of stream"""
+        try:
+            header = await reader.readexactly(LENGTH_PREFIX.size)
+            (length,) = LENGTH_PREFIX.unpack(header)
+            if length > max_bytes:
+                raise FrameTooLarge()
+            return await reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            return None
+
+
+Codec = Union[JsonCodec, MsgpackCodec]
+
+JSON_CODEC = JsonCodec()
+MSGPACK_CODEC = MsgpackCodec()
+CODECS: Dict[str, Codec] = {codec.name: codec for codec in (JSON_CODEC, MSGPACK_CODEC)}
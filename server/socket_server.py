@@ -1,153 +1,266 @@
-import socket
-import threading
-import json
+import asyncio
 import logging
-from typing import Dict, Any, Optional
-from llm import NvidiaLLMClient
+from typing import Any, Dict, List, Optional
+from llm import NvidiaLLMClient, OverloadedError, nvidia_service, tenant_key
 from config import settings
+from core.log_pipeline import get_payload_logger, setup_logging
+from core.memory import memory_store
+from .framing import CODECS, JSON_CODEC, Codec, FrameTooLarge
 
 logger = logging.getLogger(__name__)
+payload_logger = get_payload_logger(__name__)
 
 
 class ChatbotServer:
-    def __init__(self):
-        self.host = settings.HOST
-        self.port = settings.PORT
-        self.clients = {}
-        self.llm_client = NvidiaLLMClient()
-        self.server_socket = None
-        self.running = False
-
-    def start_server(self):
-        """Start the socket server"""
-        try:
-            self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.server_socket.bind((self.host, self.port))
-            self.server_socket.listen(5)
-            self.running = True
+    """Newline-delimited JSON chat server on asyncio streams.
 
-            logger.info(f"Chatbot server started on {self.host}:{self.port}")
+    Clients may switch to length-prefixed msgpack frames by sending
+    {"type": "hello", "protocol": "msgpack"}; the server acknowledges in the
+    current protocol and both sides use the new one from the next frame.
 
-            while self.running:
-                try:
-                    client_socket, address = self.server_socket.accept()
-                    logger.info(f"New connection from {address}")
+    Runs in the same event loop as the FastAPI app and shares its LLM client,
+    so TCP clients use the same upstream pools, caches and admission limits.
+    """
 
-                    client_thread = threading.Thread(
-                        target=self.handle_client, args=(client_socket, address)
-                    )
-                    client_thread.daemon = True
-                    client_thread.start()
+    def __init__(self, llm_client: Optional[NvidiaLLMClient] = None):
+        self.host = settings.SOCKET_HOST
+        self.port = settings.SOCKET_PORT
+        self.backlog = settings.SOCKET_BACKLOG
+        self.clients: Dict[str, asyncio.StreamWriter] = {}
+        # Share the app-wide client so its pools and completion cache are reused
+        self.llm_client = llm_client or nvidia_service
+        self.memory = memory_store.scope("tcp")
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.running = False
 
-                except OSError:
-                    if self.running:
-                        logger.error("Error accepting connections")
-                    break
+    async def start_server(self):
+        """Start accepting connections on the running event loop"""
+        self.server = await asyncio.start_server(
+            self.handle_client,
+            self.host,
+            self.port,
+            backlog=self.backlog,
+            # Let every worker process accept on the same port
+            reuse_port=settings.WORKERS > 1,
+            limit=settings.SOCKET_MAX_MESSAGE_BYTES,
+        )
+        self.running = True
+        logger.info(f"Chatbot server started on {self.host}:{self.port}")
 
-        except Exception as e:
-            logger.error(f"Server error: {e}")
+    async def serve_forever(self):
+        """Run the server standalone until cancelled"""
+        await self.start_server()
+        try:
+            await self.server.serve_forever()
         finally:
-            self.shutdown_server()
+            await self.shutdown_server()
 
-    def handle_client(self, client_socket: socket.socket, address: tuple):
+    async def handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
         """Handle individual client connections"""
+        address = writer.get_extra_info("peername") or ("unknown", 0)
         client_id = f"{address[0]}:{address[1]}"
-        self.clients[client_id] = client_socket
+        self.clients[client_id] = writer
+        codec: Codec = JSON_CODEC
+        writer.transport.set_write_buffer_limits(
+            high=settings.SOCKET_WRITE_BUFFER_BYTES
+        )
+        logger.info(f"New connection from {client_id}")
 
         try:
             # Send welcome message
             welcome_msg = {
                 "type": "system",
                 "message": "Welcome to the chatbot! Type your message to start chatting.",
+                "protocols": list(CODECS),
             }
-            self.send_message(client_socket, welcome_msg)
+            await self.send_message(writer, welcome_msg)
 
             while self.running:
                 try:
-                    data = client_socket.recv(1024).decode("utf-8")
-                    if not data:
-                        break
-
-                    # Parse client message
-                    try:
-                        client_message = json.loads(data)
-                        user_input = client_message.get("message", "").strip()
-
-                        if user_input.lower() in ["quit", "exit", "bye"]:
-                            goodbye_msg = {
-                                "type": "system",
-                                "message": "Goodbye! Thanks for chatting.",
-                            }
-                            self.send_message(client_socket, goodbye_msg)
-                            break
-
-                        if user_input:
-                            logger.info(f"Received from {client_id}: {user_input}")
-
-                            # Generate response using LLM
-                            bot_response = self.llm_client.generate_response(user_input)
-
-                            response_msg = {"type": "bot", "message": bot_response}
-                            self.send_message(client_socket, response_msg)
-
-                    except json.JSONDecodeError:
-                        error_msg = {
-                            "type": "error",
-                            "message": "Invalid message format. Please send valid JSON.",
-                        }
-                        self.send_message(client_socket, error_msg)
-
-                except ConnectionResetError:
-                    logger.info(f"Client {client_id} disconnected")
+                    frame = await codec.read(reader, settings.SOCKET_MAX_MESSAGE_BYTES)
+                except FrameTooLarge:
+                    await self.send_message(
+                        writer,
+                        {"type": "error", "message": "Message too large."},
+                        codec,
+                    )
                     break
-                except Exception as e:
-                    logger.error(f"Error handling client {client_id}: {e}")
+                if frame is None:
+                    break
+                if not frame.strip():
+                    continue
+
+                # Parse client message
+                try:
+                    client_message = codec.decode(frame)
+                    if not isinstance(client_message, dict):
+                        raise ValueError("Message must be an object")
+                except ValueError:
+                    error_msg = {
+                        "type": "error",
+                        "message": f"Invalid message format. Please send valid {codec.name}.",
+                    }
+                    await self.send_message(writer, error_msg, codec)
+                    continue
+
+                if client_message.get("type") == "hello":
+                    codec = await self.negotiate(writer, client_message, codec)
+                    continue
+
+                user_input = str(client_message.get("message", "")).strip()
+
+                if user_input.lower() in ["quit", "exit", "bye"]:
+                    goodbye_msg = {
+                        "type": "system",
+                        "message": "Goodbye! Thanks for chatting.",
+                    }
+                    await self.send_message(writer, goodbye_msg, codec)
                     break
 
+                if user_input:
+                    payload_logger.info("Received from %s: %s", client_id, user_input)
+                    await self.reply(
+                        writer,
+                        client_id,
+                        user_input,
+                        client_message.get("stream"),
+                        codec,
+                        tenant_key(client_message.get("user_id"), address[0]),
+                    )
+
+        except ConnectionError:
+            logger.info(f"Client {client_id} disconnected")
         except Exception as e:
-            logger.error(f"Client handler error: {e}")
+            logger.error(f"Error handling client {client_id}: {e}")
         finally:
-            client_socket.close()
-            if client_id in self.clients:
-                del self.clients[client_id]
+            self.clients.pop(client_id, None)
+            self.memory.drop(client_id)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
             logger.info(f"Client {client_id} connection closed")
 
-    def send_message(self, client_socket: socket.socket, message: Dict[str, Any]):
-        """Send JSON message to client"""
+    async def negotiate(
+        self,
+        writer: asyncio.StreamWriter,
+        client_message: Dict[str, Any],
+        codec: Codec,
+    ) -> Codec:
+        """Acknowledge a protocol switch and return the codec to use from now on"""
+        requested = CODECS.get(client_message.get("protocol"))
+        if requested is None:
+            error_msg = {
+                "type": "error",
+                "message": f"Unsupported protocol. Choose one of: {', '.join(CODECS)}.",
+            }
+            await self.send_message(writer, error_msg, codec)
+            return codec
+        await self.send_message(
+            writer, {"type": "hello", "protocol": requested.name}, codec
+        )
+        return requested
+
+    async def reply(
+        self,
+        writer: asyncio.StreamWriter,
+        client_id: str,
+        user_input: str,
+        stream: bool = False,
+        codec: Codec = JSON_CODEC,
+        tenant: Optional[str] = None,
+    ):
+        """Generate a reply with the client's history and send it"""
+        history = self.memory.history(client_id)
         try:
-            json_message = json.dumps(message) + "\n"
-            client_socket.send(json_message.encode("utf-8"))
-        except Exception as e:
-            logger.error(f"Error sending message: {e}")
+            if stream:
+                bot_response = await self.stream_reply(
+                    writer, user_input, history, codec, tenant
+                )
+            else:
+                bot_response = await self.llm_client.async_generate_response(
+                    user_input, history=history, tenant=tenant
+                )
+                await self.send_message(
+                    writer, {"type": "bot", "message": bot_response}, codec
+                )
+        except OverloadedError as e:
+            busy_msg = {
+                "type": "busy",
+                "message": f"Server is busy. Please retry in {e.retry_after_header} seconds.",
+            }
+            await self.send_message(writer, busy_msg, codec)
+            return
+        self.memory.record_exchange(client_id, user_input, bot_response)
+
+    async def stream_reply(
+        self,
+        writer: asyncio.StreamWriter,
+        user_input: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        codec: Codec = JSON_CODEC,
+        tenant: Optional[str] = None,
+    ) -> str:
+        """Forward LLM deltas as they arrive, then a final frame with the full reply"""
+        chunks = []
+        async for delta in self.llm_client.async_stream_response(
+            user_input, history=history, tenant=tenant
+        ):
+            chunks.append(delta)
+            writer.write(codec.encode_delta(delta))
+            await writer.drain()
+        reply = "".join(chunks)
+        await self.send_message(writer, {"type": "done", "message": reply}, codec)
+        return reply
 
-    def process_message_direct(self, message: str, user_id: Optional[str] = None) -> str:
+    async def send_message(
+        self,
+        writer: asyncio.StreamWriter,
+        message: Dict[str, Any],
+        codec: Codec = JSON_CODEC,
+    ):
+        """Send a message to the client, waiting if its write buffer is full"""
+        writer.write(codec.encode(message))
+        await writer.drain()
+
+    def process_message_direct(
+        self, message: str, user_id: Optional[str] = None
+    ) -> str:
         """Process a message directly without socket connection (for API use)"""
         try:
             response = self.llm_client.generate_response(message)
-            logger.info(f"Direct message processed for user {user_id}: {message}")
-            return response if response is not None else "I'm sorry, I couldn't generate a response."
+            payload_logger.info(
+                "Direct message processed for user %s: %s", user_id, message
+            )
+            return (
+                response
+                if response is not None
+                else "I'm sorry, I couldn't generate a response."
+            )
         except Exception as e:
             logger.error(f"Error processing direct message: {e}")
             return "I'm sorry, I encountered an error processing your message."
 
-    def shutdown_server(self):
+    async def shutdown_server(self):
         """Shutdown the server gracefully"""
         logger.info("Shutting down server...")
         self.running = False
 
-        # Close all client connections
-        for client_socket in self.clients.values():
-            try:
-                client_socket.close()
-            except:
-                pass
-
-        # Close server socket
-        if self.server_socket:
-            try:
-                self.server_socket.close()
-            except:
-                pass
+        # Stop accepting, then close all client connections
+        if self.server is not None:
+            self.server.close()
+        for writer in list(self.clients.values()):
+            writer.close()
+        if self.server is not None:
+            await self.server.wait_closed()
+            self.server = None
 
         logger.info("Server shutdown complete")
+
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(ChatbotServer().serve_forever())
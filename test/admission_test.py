@@ -0,0 +1,68 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm import AdmissionController, ModelRouter, NvidiaLLMClient  # noqa: E402
+
+
+def test_slow_model_backlog_does_not_shed_other_models():
+    """Requests queued on a saturated lane must not hold global admission slots"""
+
+    async def run():
+        client = NvidiaLLMClient()
+        client.admission = AdmissionController(
+            max_in_flight=4, max_queue=16, queue_timeout=0.5
+        )
+        client.router = ModelRouter(
+            client._create_async_client,
+            default_concurrency=4,
+            concurrency_limits={"slow": 1},
+        )
+        release = asyncio.Event()
+
+        async def slow_call():
+            async with client._upstream_slot("slow"):
+                await release.wait()
+
+        slow = [asyncio.create_task(slow_call()) for _ in range(6)]
+        await asyncio.sleep(0.05)
+        assert client.router.lane("slow").waiting == 5
+        assert client.admission.in_flight == 1
+
+        # Another model is still admitted straight away
+        async with client._upstream_slot("fast"):
+            assert client.admission.in_flight == 2
+
+        release.set()
+        await asyncio.gather(*slow)
+        await client.aclose()
+
+    asyncio.run(run())
+
+
+def test_batch_tenant_saturating_a_lane_does_not_starve_interactive():
+    """A lane's wait queue serves tenants fairly, not in arrival order"""
+
+    async def run():
+        client = NvidiaLLMClient()
+        client.admission = AdmissionController(
+            max_in_flight=64, max_queue=256, queue_timeout=5
+        )
+        client.router = ModelRouter(client._create_async_client, default_concurrency=1)
+        served = []
+
+        async def call(tenant: str):
+            async with client._upstream_slot("model", tenant):
+                served.append(tenant)
+                await asyncio.sleep(0.001)
+
+        batch = [asyncio.create_task(call("user:batch")) for _ in range(40)]
+        await asyncio.sleep(0.01)
+        interactive = asyncio.create_task(call("user:interactive"))
+        await asyncio.gather(*batch, interactive)
+        assert served.index("user:interactive") <= 3
+        await client.aclose()
+
+    asyncio.run(run())
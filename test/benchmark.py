@@ -0,0 +1,325 @@
+"""Offline load generator for the chatbot's HTTP, WebSocket and TCP interfaces.
+
+With --spawn it starts the fake NVIDIA upstream, the NMT stub and the app
+on local ports, so no API key or network access is needed:
+
+    python test/benchmark.py --spawn --scenario ws --stream \\
+        --concurrency 50 --requests 2000 --output results.json
+
+Results are printed as JSON. Pass --baseline with an earlier result file to
+exit non-zero when throughput or p95 latency regress beyond --tolerance.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+import httpx
+import websockets
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TEST_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from server.framing import CODECS, JSON_CODEC  # noqa: E402
+
+SCENARIOS = ["chat", "ws", "ws-translate", "tcp"]
+
+
+class Results:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.ttfts: List[float] = []
+        self.errors: Dict[str, int] = {}
+
+    def error(self, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(values: List[float]) -> Optional[Dict[str, float]]:
+    if not values:
+        return None
+    return {
+        "p50": round(percentile(values, 50) * 1000, 2),
+        "p95": round(percentile(values, 95) * 1000, 2),
+        "p99": round(percentile(values, 99) * 1000, 2),
+        "mean": round(sum(values) / len(values) * 1000, 2),
+        "max": round(max(values) * 1000, 2),
+    }
+
+
+async def chat_worker(args, results: Results, remaining: List[int]):
+    async with httpx.AsyncClient(base_url=args.http_url, timeout=60) as client:
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            started = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/chat", json={"message": f"Benchmark prompt {remaining[0]}"}
+                )
+            except httpx.HTTPError as e:
+                results.error(type(e).__name__)
+                continue
+            if response.status_code != 200:
+                results.error(f"status_{response.status_code}")
+                continue
+            results.latencies.append(time.perf_counter() - started)
+
+
+async def ws_worker(args, results: Results, remaining: List[int]):
+    translate = args.scenario == "ws-translate"
+    async with websockets.connect(f"{args.ws_url}/ws/chat") as ws:
+        await ws.recv()
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            message = {
+                "type": "translate" if translate else "message",
+                "text": f"Benchmark prompt {remaining[0]}",
+                "stream": args.stream,
+            }
+            started = time.perf_counter()
+            first = None
+            await ws.send(json.dumps(message))
+            while True:
+                reply = json.loads(await ws.recv())
+                if reply["type"] == "delta":
+                    if first is None:
+                        first = time.perf_counter() - started
+                    continue
+                break
+            if reply["type"] in ("busy", "error"):
+                results.error(reply["type"])
+                continue
+            results.latencies.append(time.perf_counter() - started)
+            if first is not None:
+                results.ttfts.append(first)
+
+
+async def tcp_worker(args, results: Results, remaining: List[int]):
+    reader, writer = await asyncio.open_connection(args.tcp_host, args.tcp_port)
+    codec = JSON_CODEC
+    max_bytes = 16 * 1024 * 1024
+    await codec.read(reader, max_bytes)
+    if args.protocol != "json":
+        writer.write(codec.encode({"type": "hello", "protocol": args.protocol}))
+        await codec.read(reader, max_bytes)
+        codec = CODECS[args.protocol]
+    try:
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            started = time.perf_counter()
+            first = None
+            writer.write(
+                codec.encode(
+                    {
+                        "message": f"Benchmark prompt {remaining[0]}",
+                        "stream": args.stream,
+                    }
+                )
+            )
+            while True:
+                reply = codec.decode(await codec.read(reader, max_bytes))
+                # msgpack deltas are bare strings
+                if isinstance(reply, str) or reply["type"] == "delta":
+                    if first is None:
+                        first = time.perf_counter() - started
+                    continue
+                break
+            if reply["type"] in ("busy", "error"):
+                results.error(reply["type"])
+                continue
+            results.latencies.append(time.perf_counter() - started)
+            if first is not None:
+                results.ttfts.append(first)
+    finally:
+        writer.close()
+
+
+WORKERS = {
+    "chat": chat_worker,
+    "ws": ws_worker,
+    "ws-translate": ws_worker,
+    "tcp": tcp_worker,
+}
+
+
+async def run(args) -> dict:
+    results = Results()
+    remaining = [args.requests]
+    worker = WORKERS[args.scenario]
+
+    async def guarded():
+        try:
+            await worker(args, results, remaining)
+        except (OSError, websockets.WebSocketException) as e:
+            results.error(type(e).__name__)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[guarded() for _ in range(args.concurrency)])
+    duration = time.perf_counter() - started
+
+    report = {
+        "scenario": args.scenario,
+        "stream": args.stream,
+        "protocol": args.protocol if args.scenario == "tcp" else None,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "completed": len(results.latencies),
+        "errors": results.errors,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(results.latencies) / duration, 2),
+        "latency_ms": summarize(results.latencies),
+        "ttft_ms": summarize(results.ttfts),
+    }
+    if args.spawn:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"http://127.0.0.1:{args.upstream_port}/stats")
+            report["upstream"] = response.json()
+    return report
+
+
+def wait_for_port(port: int, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Nothing listening on port {port} after {timeout}s")
+
+
+def spawn(args) -> List[subprocess.Popen]:
+    """Start the fake upstream, the NMT stub and the app on local ports"""
+    upstream = [
+        sys.executable,
+        os.path.join(TEST_DIR, "fake_upstream.py"),
+        "--port",
+        str(args.upstream_port),
+        "--latency-ms",
+        str(args.upstream_latency_ms),
+        "--token-delay-ms",
+        str(args.token_delay_ms),
+        "--error-rate",
+        str(args.upstream_error_rate),
+    ]
+    nmt = [
+        sys.executable,
+        os.path.join(TEST_DIR, "nmt_stub.py"),
+        "--port",
+        str(args.nmt_port),
+        "--latency-ms",
+        str(args.nmt_latency_ms),
+    ]
+    env = dict(
+        os.environ,
+        NVIDIA_API_KEY="benchmark",
+        NVIDIA_BASE_URL=f"http://127.0.0.1:{args.upstream_port}/v1",
+        TRANSLATION_SERVER=f"127.0.0.1:{args.nmt_port}",
+        TRANSLATION_USE_SSL="false",
+        SOCKET_SERVER_ENABLED="true",
+        SOCKET_HOST="127.0.0.1",
+        SOCKET_PORT=str(args.tcp_port),
+    )
+    app = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "app:app",
+        "--port",
+        str(args.app_port),
+        "--log-level",
+        "warning",
+    ]
+    processes = [
+        subprocess.Popen(upstream),
+        subprocess.Popen(nmt),
+        subprocess.Popen(app, cwd=ROOT_DIR, env=env),
+    ]
+    for port in (args.upstream_port, args.nmt_port, args.app_port, args.tcp_port):
+        wait_for_port(port)
+    return processes
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """List the metrics that regressed beyond the tolerance"""
+    regressions = []
+    if report["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        regressions.append(
+            f"throughput {report['throughput_rps']} < {baseline['throughput_rps']}"
+        )
+    for metric in ("latency_ms", "ttft_ms"):
+        current, previous = report.get(metric), baseline.get(metric)
+        if current and previous and current["p95"] > previous["p95"] * (1 + tolerance):
+            regressions.append(f"{metric} p95 {current['p95']} > {previous['p95']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", choices=SCENARIOS, default="chat")
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--protocol", choices=list(CODECS), default="json")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--http-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--ws-url", default="ws://127.0.0.1:8000")
+    parser.add_argument("--tcp-host", default="127.0.0.1")
+    parser.add_argument("--tcp-port", type=int, default=8888)
+    parser.add_argument("--spawn", action="store_true")
+    parser.add_argument("--app-port", type=int, default=8000)
+    parser.add_argument("--upstream-port", type=int, default=9000)
+    parser.add_argument("--nmt-port", type=int, default=50051)
+    parser.add_argument("--upstream-latency-ms", type=float, default=200.0)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--token-delay-ms", type=float, default=20.0)
+    parser.add_argument("--nmt-latency-ms", type=float, default=30.0)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    processes = []
+    if args.spawn:
+        args.http_url = f"http://127.0.0.1:{args.app_port}"
+        args.ws_url = f"ws://127.0.0.1:{args.app_port}"
+        args.tcp_host = "127.0.0.1"
+        processes = spawn(args)
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Local fake of the OpenAI-compatible NVIDIA API for offline testing.
+
+Run it, then point the chatbot at it:
+
+    python test/fake_upstream.py --port 9000 --error-rate 0.3 --error-status 503
+    NVIDIA_BASE_URL=http://127.0.0.1:9000/v1 NVIDIA_API_KEY=test python main.py
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+
+class FakeUpstreamConfig:
+    latency_ms = 200.0
+    jitter_ms = 50.0
+    # Fraction of requests that take slow_ms instead (tail latency for hedging)
+    slow_rate = 0.0
+    slow_ms = 3000.0
+    error_rate = 0.0
+    error_status = 503
+    retry_after = None
+    token_delay_ms = 20.0
+    reply = "This is a reply from the fake upstream. It streams one word at a time."
+
+
+config = FakeUpstreamConfig()
+stats = Counter()
+app = FastAPI(title="Fake NVIDIA upstream")
+
+
+def _latency() -> float:
+    if random.random() < config.slow_rate:
+        return config.slow_ms / 1000
+    return max(0.0, random.gauss(config.latency_ms, config.jitter_ms)) / 1000
+
+
+def _error_response():
+    headers = {}
+    if config.retry_after is not None:
+        headers["Retry-After"] = str(config.retry_after)
+    return JSONResponse(
+        {"error": {"message": "Injected failure", "code": config.error_status}},
+        status_code=config.error_status,
+        headers=headers,
+    )
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    payload = await request.json()
+    stats["requests"] += 1
+    await asyncio.sleep(_latency())
+
+    if random.random() < config.error_rate:
+        stats[f"status_{config.error_status}"] += 1
+        return _error_response()
+    stats["status_200"] += 1
+
+    model = payload.get("model", "fake-model")
+    if not payload.get("stream"):
+        return {
+            "id": f"fake-{time.time_ns()}",
+            "object": "chat.completion",
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": config.reply},
+                    "finish_reason": "stop",
+                }
+            ],
+        }
+
+    async def events():
+        for index, word in enumerate(config.reply.split(" ")):
+            delta = word if index == 0 else f" {word}"
+            chunk = {
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": delta}}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(config.token_delay_ms / 1000)
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/v1/models")
+async def models():
+    return {"object": "list", "data": [{"id": "fake-model", "object": "model"}]}
+
+
+@app.get("/stats")
+async def get_stats():
+    return dict(stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=config.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=config.jitter_ms)
+    parser.add_argument("--slow-rate", type=float, default=config.slow_rate)
+    parser.add_argument("--slow-ms", type=float, default=config.slow_ms)
+    parser.add_argument("--error-rate", type=float, default=config.error_rate)
+    parser.add_argument("--error-status", type=int, default=config.error_status)
+    parser.add_argument("--retry-after", type=float, default=config.retry_after)
+    parser.add_argument("--token-delay-ms", type=float, default=config.token_delay_ms)
+    args = parser.parse_args()
+
+    for name, value in vars(args).items():
+        if hasattr(config, name):
+            setattr(config, name, value)
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Local stub of the Riva NMT gRPC service for offline testing.
+
+Run it, then point the chatbot at it:
+
+    python test/nmt_stub.py --port 50051 --latency-ms 30
+    TRANSLATION_SERVER=127.0.0.1:50051 TRANSLATION_USE_SSL=false python main.py
+
+Translations are the source text prefixed with the target language code.
+"""
+
+import argparse
+import asyncio
+import random
+from collections import Counter
+import grpc
+import riva.client.proto.riva_nmt_pb2 as riva_nmt
+import riva.client.proto.riva_nmt_pb2_grpc as riva_nmt_grpc
+
+
+class NmtStubConfig:
+    latency_ms = 30.0
+    jitter_ms = 5.0
+    # Extra latency per text in a batch
+    per_text_ms = 1.0
+    error_rate = 0.0
+    languages = ["de", "en", "es", "fr", "ja", "zh"]
+
+
+config = NmtStubConfig()
+stats = Counter()
+
+
+class TranslationStub(riva_nmt_grpc.RivaTranslationServicer):
+    async def TranslateText(self, request, context):
+        stats["requests"] += 1
+        stats["texts"] += len(request.texts)
+        delay = random.gauss(config.latency_ms, config.jitter_ms)
+        delay += config.per_text_ms * len(request.texts)
+        await asyncio.sleep(max(0.0, delay) / 1000)
+
+        if random.random() < config.error_rate:
+            stats["errors"] += 1
+            await context.abort(grpc.StatusCode.UNAVAILABLE, "Injected failure")
+
+        return riva_nmt.TranslateTextResponse(
+            translations=[
+                riva_nmt.Translation(
+                    text=f"[{request.target_language}] {text}",
+                    language=request.target_language,
+                )
+                for text in request.texts
+            ]
+        )
+
+    async def ListSupportedLanguagePairs(self, request, context):
+        stats["language_requests"] += 1
+        response = riva_nmt.AvailableLanguageResponse()
+        pair = response.languages["stub"]
+        pair.src_lang.extend(config.languages)
+        pair.tgt_lang.extend(config.languages)
+        return response
+
+
+async def serve(host: str, port: int):
+    server = grpc.aio.server()
+    riva_nmt_grpc.add_RivaTranslationServicer_to_server(TranslationStub(), server)
+    server.add_insecure_port(f"{host}:{port}")
+    await server.start()
+    await server.wait_for_termination()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=50051)
+    parser.add_argument("--latency-ms", type=float, default=config.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=config.jitter_ms)
+    parser.add_argument("--per-text-ms", type=float, default=config.per_text_ms)
+    parser.add_argument("--error-rate", type=float, default=config.error_rate)
+    args = parser.parse_args()
+
+    for name, value in vars(args).items():
+        if hasattr(config, name):
+            setattr(config, name, value)
+
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
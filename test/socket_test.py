@@ -22,7 +22,7 @@ def test_socket():
 
         # Send test message
         test_msg = {"message": "Hello, bot!"}
-        sock.send(json.dumps(test_msg).encode("utf-8"))
+        sock.send((json.dumps(test_msg) + "\n").encode("utf-8"))
         print("📤 Sent: Hello, bot!")
 
         # Receive response
@@ -32,7 +32,7 @@ def test_socket():
 
         # Send quit message
         quit_msg = {"message": "quit"}
-        sock.send(json.dumps(quit_msg).encode("utf-8"))
+        sock.send((json.dumps(quit_msg) + "\n").encode("utf-8"))
         print("📤 Sent: quit")
 
         # Receive goodbye
@@ -44,7 +44,7 @@ def test_socket():
 
     except ConnectionRefusedError:
         print("❌ Connection refused. Start socket server first:")
-        print("   curl -X POST http://localhost:8000/socket/start")
+        print("   SOCKET_SERVER_ENABLED=true python main.py")
     except Exception as e:
         print(f"❌ Error: {e}")
 
@@ -0,0 +1,4 @@
+from .riva_client import RivaTranslationClient
+from .batcher import TranslationBatcher
+from .sentences import SentenceSplitter
+from .cache import TranslationCache
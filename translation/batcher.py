@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Set, Tuple
+import grpc
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = metrics.histogram(
+    "chatbot_translation_batch_size",
+    "Texts sent per translation backend call",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+
+LanguagePair = Tuple[str, str]
+
+
+class BatchMismatchError(ValueError):
+    """The backend returned a different number of translations than texts sent"""
+
+
+def _caused_by_item(error: Exception) -> bool:
+    """Whether a batch failure may come from one bad text rather than the backend"""
+    if isinstance(error, grpc.RpcError):
+        return error.code() == grpc.StatusCode.INVALID_ARGUMENT
+    return isinstance(error, BatchMismatchError)
+
+
+class TranslationBatcher:
+    """Gather translation requests per language pair and send each group as one call.
+
+    A batch is flushed when it reaches ``max_batch`` texts or ``window`` seconds
+    after its first request arrived, whichever comes first. If a batch is
+    rejected because of its content, its texts are retried one by one so a
+    single bad text only fails its own caller; backend errors fail the batch.
+    """
+
+    def __init__(
+        self,
+        translate: Callable[[List[str], str, str], Awaitable[List[str]]],
+        window: float,
+        max_batch: int,
+    ):
+        self.translate_batch = translate
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: Dict[LanguagePair, List[Tuple[str, asyncio.Future]]] = {}
+        self._timers: Dict[LanguagePair, asyncio.TimerHandle] = {}
+        # Strong references so in-flight sends are not garbage-collected
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def translate(
+        self, text: str, source_language: str, target_language: str
+    ) -> str:
+        loop = asyncio.get_running_loop()
+        pair = (source_language, target_language)
+        future = loop.create_future()
+        pending = self._pending.setdefault(pair, [])
+        pending.append((text, future))
+        if len(pending) >= self.max_batch:
+            self._flush(pair)
+        elif len(pending) == 1:
+            self._timers[pair] = loop.call_later(self.window, self._flush, pair)
+        return await future
+
+    def _flush(self, pair: LanguagePair):
+        timer = self._timers.pop(pair, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(pair, None)
+        if batch:
+            task = asyncio.ensure_future(self._send(pair, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, pair: LanguagePair, batch: List[Tuple[str, asyncio.Future]]):
+        BATCH_SIZE.observe(len(batch))
+        try:
+            results = await self.translate_batch([text for text, _ in batch], *pair)
+            if len(results) != len(batch):
+                raise BatchMismatchError(
+                    f"Expected {len(batch)} translations, got {len(results)}"
+                )
+        except Exception as e:
+            if len(batch) > 1 and _caused_by_item(e):
+                logger.warning(
+                    f"Batched translation {pair[0]}->{pair[1]} failed, "
+                    f"retrying {len(batch)} texts individually: {e}"
+                )
+                await asyncio.gather(
+                    *[self._send(pair, [item]) for item in batch if not item[1].done()]
+                )
+                return
+            logger.error(f"Translation {pair[0]}->{pair[1]} failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Set, Tuple
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_LATENCY = metrics.histogram(
+    "chatbot_translation_cache_lookup_seconds",
+    "Translation cache lookup latency per tier that answered",
+    ["tier"],
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05),
+)
+
+# Disk hits refresh their access time for LRU eviction at most this often,
+# in batches of up to TOUCH_BATCH keys, so lookups stay read-only
+ACCESS_REFRESH_SECONDS = 300
+TOUCH_BATCH = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    key TEXT PRIMARY KEY,
+    translation TEXT NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS translations_accessed ON translations (accessed);
+"""
+
+
+class TranslationCache:
+    """Two-tier cache of finished translations.
+
+    A small in-process LRU answers repeats without leaving the event loop.
+    Behind it, a SQLite database in WAL mode survives restarts and is shared
+    by every worker on the host; it is trimmed to ``max_entries`` by least
+    recent access. Lookups run read-only on their own thread and connection;
+    writes, including batched access-time refreshes, go through a single
+    writer thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int,
+        hot_entries: int,
+        model: str = "",
+        enabled: bool = True,
+        evict_every: int = 100,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.hot_entries = hot_entries
+        self.model = model
+        self.enabled = enabled
+        self.evict_every = evict_every
+        self.hot_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.lookup_seconds = 0.0
+        self._hot: "OrderedDict[str, str]" = OrderedDict()
+        self._writes = 0
+        self._touched: Set[str] = set()
+        self._read_db: Optional[sqlite3.Connection] = None
+        self._write_db: Optional[sqlite3.Connection] = None
+        self._reader = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="translation-cache-read"
+        )
+        self._writer = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="translation-cache-write"
+        )
+
+    def make_key(self, text: str, source_language: str, target_language: str) -> str:
+        raw = "\0".join((self.model, source_language, target_language, text))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(_SCHEMA)
+        return db
+
+    def _reader_db(self) -> sqlite3.Connection:
+        if self._read_db is None:
+            self._read_db = self._connect()
+        return self._read_db
+
+    def _writer_db(self) -> sqlite3.Connection:
+        if self._write_db is None:
+            self._write_db = self._connect()
+        return self._write_db
+
+    def _remember(self, key: str, translation: str):
+        self._hot[key] = translation
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.hot_entries:
+            self._hot.popitem(last=False)
+
+    async def get(
+        self, text: str, source_language: str, target_language: str
+    ) -> Optional[str]:
+        if not self.enabled:
+            return None
+        started = time.perf_counter()
+        key = self.make_key(text, source_language, target_language)
+        translation = self._hot.get(key)
+        if translation is not None:
+            self._hot.move_to_end(key)
+            self.hot_hits += 1
+            self._observe("memory", started)
+            return translation
+
+        try:
+            translation, stale = await asyncio.get_running_loop().run_in_executor(
+                self._reader, self._load, key
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Translation cache lookup failed: {e}")
+            translation, stale = None, False
+        if translation is None:
+            self.misses += 1
+            self._observe("miss", started)
+            return None
+        self.disk_hits += 1
+        self._remember(key, translation)
+        if stale:
+            self._touched.add(key)
+            if len(self._touched) >= TOUCH_BATCH:
+                self._flush_touched()
+        self._observe("disk", started)
+        return translation
+
+    def put(
+        self, text: str, source_language: str, target_language: str, translation: str
+    ):
+        """Store a translation; the disk write happens in the background"""
+        if not self.enabled:
+            return
+        key = self.make_key(text, source_language, target_language)
+        self._remember(key, translation)
+        self._writer.submit(self._store, key, translation)
+
+    def _flush_touched(self):
+        keys, self._touched = self._touched, set()
+        self._writer.submit(self._touch, keys)
+
+    def _observe(self, tier: str, started: float):
+        elapsed = time.perf_counter() - started
+        self.lookup_seconds += elapsed
+        LOOKUP_LATENCY.observe(elapsed, tier)
+
+    def _load(self, key: str) -> Tuple[Optional[str], bool]:
+        """Read one translation and whether its access time needs a refresh"""
+        row = (
+            self._reader_db()
+            .execute(
+                "SELECT translation, accessed FROM translations WHERE key = ?", (key,)
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None, False
+        return row[0], time.time() - row[1] > ACCESS_REFRESH_SECONDS
+
+    def _touch(self, keys: Set[str]):
+        try:
+            db = self._writer_db()
+            now = time.time()
+            with db:
+                db.executemany(
+                    "UPDATE translations SET accessed = ? WHERE key = ?",
+                    [(now, key) for key in keys],
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Translation cache access update failed: {e}")
+
+    def _store(self, key: str, translation: str):
+        try:
+            db = self._writer_db()
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO translations (key, translation, accessed) "
+                    "VALUES (?, ?, ?)",
+                    (key, translation, time.time()),
+                )
+            self._writes += 1
+            if self._writes % self.evict_every == 0:
+                self._evict(db)
+        except sqlite3.Error as e:
+            logger.warning(f"Translation cache write failed: {e}")
+
+    def _evict(self, db: sqlite3.Connection):
+        (count,) = db.execute("SELECT COUNT(*) FROM translations").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            with db:
+                db.execute(
+                    "DELETE FROM translations WHERE key IN "
+                    "(SELECT key FROM translations ORDER BY accessed LIMIT ?)",
+                    (excess,),
+                )
+
+    def stats(self) -> dict:
+        lookups = self.hot_hits + self.disk_hits + self.misses
+        return {
+            "hot_entries": len(self._hot),
+            "hot_hits": self.hot_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hot_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "avg_lookup_ms": (
+                round(self.lookup_seconds / lookups * 1000, 3) if lookups else 0.0
+            ),
+        }
+
+    def close(self):
+        """Finish pending writes and close the database"""
+        if self._touched:
+            self._flush_touched()
+        self._reader.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+        for db in (self._read_db, self._write_db):
+            if db is not None:
+                db.close()
+        self._read_db = self._write_db = None
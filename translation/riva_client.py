@@ -0,0 +1,88 @@
+import grpc
+import logging
+from typing import Dict, List, Optional, Tuple
+import riva.client.proto.riva_nmt_pb2 as riva_nmt
+import riva.client.proto.riva_nmt_pb2_grpc as riva_nmt_srv
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RivaTranslationClient:
+    """Asynchronous Riva NMT client that keeps one gRPC channel open for the process"""
+
+    def __init__(
+        self,
+        server: Optional[str] = None,
+        use_ssl: Optional[bool] = None,
+        function_id: Optional[str] = None,
+        api_key: Optional[str] = None,
+    ):
+        self.server = server or settings.TRANSLATION_SERVER
+        self.use_ssl = settings.TRANSLATION_USE_SSL if use_ssl is None else use_ssl
+        self.function_id = (
+            settings.TRANSLATION_FUNCTION_ID if function_id is None else function_id
+        )
+        self.api_key = settings.NVIDIA_API_KEY if api_key is None else api_key
+        self.model = settings.TRANSLATION_MODEL
+        self.timeout = settings.TRANSLATION_TIMEOUT
+        self._channel: Optional[grpc.aio.Channel] = None
+        self._stub: Optional[riva_nmt_srv.RivaTranslationStub] = None
+
+    @property
+    def metadata(self) -> Tuple[Tuple[str, str], ...]:
+        metadata = []
+        if self.function_id:
+            metadata.append(("function-id", self.function_id))
+        if self.api_key:
+            metadata.append(("authorization", f"Bearer {self.api_key}"))
+        return tuple(metadata)
+
+    @property
+    def stub(self) -> riva_nmt_srv.RivaTranslationStub:
+        """Translation stub on the shared channel, opened on first use"""
+        if self._stub is None:
+            if self.use_ssl:
+                self._channel = grpc.aio.secure_channel(
+                    self.server, grpc.ssl_channel_credentials()
+                )
+            else:
+                self._channel = grpc.aio.insecure_channel(self.server)
+            self._stub = riva_nmt_srv.RivaTranslationStub(self._channel)
+            logger.info(f"Opened Riva NMT channel to {self.server}")
+        return self._stub
+
+    async def translate(
+        self, texts: List[str], source_language: str, target_language: str
+    ) -> List[str]:
+        """Translate a list of texts in one call, preserving order"""
+        request = riva_nmt.TranslateTextRequest(
+            texts=texts,
+            model=self.model,
+            source_language=source_language,
+            target_language=target_language,
+        )
+        response = await self.stub.TranslateText(
+            request, metadata=self.metadata, timeout=self.timeout
+        )
+        return [translation.text for translation in response.translations]
+
+    async def list_languages(self) -> Dict[str, List[str]]:
+        """Return the supported source and target language codes"""
+        request = riva_nmt.AvailableLanguageRequest(model=self.model)
+        response = await self.stub.ListSupportedLanguagePairs(
+            request, metadata=self.metadata, timeout=self.timeout
+        )
+        src_langs = set()
+        tgt_langs = set()
+        for pair in response.languages.values():
+            src_langs.update(pair.src_lang)
+            tgt_langs.update(pair.tgt_lang)
+        return {"from_text": sorted(src_langs), "to_text": sorted(tgt_langs)}
+
+    async def aclose(self):
+        """Close the shared gRPC channel"""
+        if self._channel is not None:
+            await self._channel.close()
+            self._channel = None
+            self._stub = None
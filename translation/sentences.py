@@ -0,0 +1,42 @@
+import re
+from typing import List, Optional, Tuple
+
+# Sentence end punctuation (Latin and CJK) followed by whitespace, or a line break
+_BOUNDARY = re.compile(r"(?<=[.!?。！？])\s+|\n+")
+
+
+class SentenceSplitter:
+    """Cut streamed text into sentences as soon as each one is complete.
+
+    Fragments shorter than ``min_chars`` (list markers, "e.g.") are held
+    back and joined with the next sentence so they are not translated out
+    of context. Each sentence comes with the whitespace that followed it, so
+    callers can keep line breaks and paragraphs when reassembling the text.
+    """
+
+    def __init__(self, min_chars: int = 12):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        """Add streamed text and return (sentence, separator) pairs it completed"""
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in _BOUNDARY.finditer(self._buffer):
+            if match.end() == len(self._buffer):
+                # The separator may continue in the next chunk ("\n" then "\n")
+                break
+            sentence = self._buffer[start : match.start()].strip()
+            if len(sentence) < self.min_chars:
+                continue
+            sentences.append((sentence, match.group()))
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Return whatever is left once the stream has ended"""
+        rest = self._buffer.strip()
+        self._buffer = ""
+        return rest or None